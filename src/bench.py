@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+import platform
+import tempfile
+from markdown import markdown_to_blocks, block_to_block_type, text_to_textnodes, markdown_to_html_node, BlockType
+from template import Template
+from sync import sync_directory
+from main import generate_pages_recursive
+
+SHAPES = ["paragraphs", "links", "lists", "deep", "images"]
+
+TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <title>{{ Title }}</title>
+    <link rel="stylesheet" href="./index.css">
+</head>
+<body>
+    {{ Content }}
+</body>
+</html>"""
+
+WORDS = ("the", "ring", "hobbit", "shire", "elf", "dwarf", "wizard", "road", "river",
+         "mountain", "forest", "king", "sword", "star", "song", "fire", "shadow", "tree")
+
+
+def _sentence(rng, words=12):
+    """A sentence of random words with some inline markdown sprinkled in."""
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word = f"**{word}**"
+        elif roll < 0.10:
+            word = f"_{word}_"
+        elif roll < 0.13:
+            word = f"`{word}`"
+        parts.append(word)
+    return " ".join(parts).capitalize() + "."
+
+def _page(rng, shape, index, paragraphs):
+    """Markdown for one synthetic page of the given shape."""
+    blocks = [f"# Page {index}"]
+    for i in range(paragraphs):
+        if shape == "paragraphs":
+            blocks.append(" ".join(_sentence(rng) for _ in range(20)))
+        elif shape == "links":
+            blocks.append(" ".join(f"[{rng.choice(WORDS)} {j}](/blog/post-{j})" for j in range(50)))
+        elif shape == "lists":
+            blocks.append("\n".join(f"- {_sentence(rng, 6)}" for _ in range(20)))
+            blocks.append("\n".join(f"{j + 1}. {_sentence(rng, 6)}" for j in range(10)))
+        elif shape == "images":
+            blocks.append(f"![image {i}](/images/image-{i % 10}.png) {_sentence(rng)}")
+        else:
+            blocks.append(_sentence(rng))
+        if i % 5 == 4:
+            blocks.append(f"## Section {i}")
+            blocks.append("> " + _sentence(rng))
+            blocks.append("```\ndef f():\n    return 1\n```")
+    return "\n\n".join(blocks) + "\n"
+
+def generate_corpus(root, shape="paragraphs", pages=100, paragraphs=20, depth=6, image_size=1 << 20, seed=0):
+    """
+    Write a synthetic site (content/, static/ and template.html) under root.
+    "deep" spreads pages over directories depth levels deep, and "images"
+    also writes ten image files of image_size bytes to static/images.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown corpus shape: {shape}")
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static")
+
+    for index in range(pages):
+        if shape == "deep":
+            levels = [f"level-{(index >> level) % 4}" for level in range(depth)]
+            page_dir = os.path.join(content_dir, *levels, f"page-{index}")
+        else:
+            page_dir = os.path.join(content_dir, f"page-{index}")
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.md"), 'w') as f:
+            f.write(_page(rng, shape, index, paragraphs))
+
+    os.makedirs(os.path.join(static_dir, "images"), exist_ok=True)
+    with open(os.path.join(static_dir, "index.css"), 'w') as f:
+        f.write("body { font-family: serif; }\n")
+    if shape == "images":
+        for i in range(10):
+            with open(os.path.join(static_dir, "images", f"image-{i}.png"), 'wb') as f:
+                f.write(rng.randbytes(image_size))
+
+    with open(os.path.join(root, "template.html"), 'w') as f:
+        f.write(TEMPLATE)
+
+def _time(func, repeat):
+    """Best wall time of func over repeat runs."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_corpus(root, repeat=3):
+    """Time each build stage over the corpus under root, returning seconds per stage."""
+    content_dir = os.path.join(root, "content")
+    pages = []
+    for dirpath, _, filenames in os.walk(content_dir):
+        for name in sorted(filenames):
+            with open(os.path.join(dirpath, name), 'r') as f:
+                pages.append(f.read())
+
+    blocks = [block for page in pages for block in markdown_to_blocks(page)]
+    inline_blocks = [block for block in blocks if block_to_block_type(block) != BlockType.CODE]
+    nodes = [markdown_to_html_node(page) for page in pages]
+    html = [node.to_html() for node in nodes]
+    template = Template(TEMPLATE)
+    filled = [template.render(Title="Page", Content=content) for content in html]
+
+    def write_pages():
+        with tempfile.TemporaryDirectory() as out:
+            for i, page in enumerate(filled):
+                with open(os.path.join(out, f"{i}.html"), 'w') as f:
+                    f.write(page)
+
+    def sync_static():
+        with tempfile.TemporaryDirectory() as out:
+            sync_directory(os.path.join(root, "static"), out)
+
+    def full_build():
+        with tempfile.TemporaryDirectory() as out:
+            generate_pages_recursive(content_dir, os.path.join(root, "template.html"), out)
+
+    stages = {}
+    stages["markdown_to_blocks"] = _time(lambda: [markdown_to_blocks(page) for page in pages], repeat)
+    stages["block_to_block_type"] = _time(lambda: [block_to_block_type(block) for block in blocks], repeat)
+    stages["text_to_textnodes"] = _time(lambda: [text_to_textnodes(block) for block in inline_blocks], repeat)
+    stages["markdown_to_html_node"] = _time(lambda: [markdown_to_html_node(page) for page in pages], repeat)
+    stages["to_html"] = _time(lambda: [node.to_html() for node in nodes], repeat)
+    stages["template_fill"] = _time(lambda: [template.render(Title="Page", Content=content) for content in html], repeat)
+    stages["file_write"] = _time(write_pages, repeat)
+    stages["static_sync"] = _time(sync_static, repeat)
+    stages["full_build"] = _time(full_build, repeat)
+    return stages
+
+def compare_results(results, baseline, threshold=0.10):
+    """
+    Compare stage timings against a baseline. Returns a list of
+    (shape, stage, baseline seconds, current seconds) for every stage that
+    got slower by more than threshold.
+    """
+    regressions = []
+    for shape, stages in results["shapes"].items():
+        baseline_stages = baseline.get("shapes", {}).get(shape, {})
+        for stage, seconds in stages.items():
+            before = baseline_stages.get(stage)
+            if before and seconds > before * (1 + threshold):
+                regressions.append((shape, stage, before, seconds))
+    return regressions
+
+def run(shapes, pages, paragraphs, repeat, image_size, quiet=True):
+    """Generate a corpus for every shape and benchmark it."""
+    results = {
+        "python": platform.python_version(),
+        "corpus": {"pages": pages, "paragraphs": paragraphs, "image_size": image_size},
+        "shapes": {},
+    }
+    for shape in shapes:
+        with tempfile.TemporaryDirectory() as root:
+            generate_corpus(root, shape, pages=pages, paragraphs=paragraphs, image_size=image_size)
+            if quiet:
+                # The build stages print a line per file, which would dominate the timings
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    results["shapes"][shape] = bench_corpus(root, repeat)
+            else:
+                results["shapes"][shape] = bench_corpus(root, repeat)
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator on synthetic content.")
+    parser.add_argument("--shape", action="append", choices=SHAPES,
+                        help="corpus shape to benchmark, may be repeated (default: all)")
+    parser.add_argument("--pages", type=int, default=100, help="pages per corpus (default: 100)")
+    parser.add_argument("--paragraphs", type=int, default=20, help="content blocks per page (default: 20)")
+    parser.add_argument("--image-size", type=int, default=1 << 20,
+                        help="bytes per image in the images corpus (default: 1 MiB)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, best is kept (default: 3)")
+    parser.add_argument("--output", default="bench_results.json", help="where to save results")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also save the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown before a stage counts as a regression (default: 0.10)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.shape or SHAPES, args.pages, args.paragraphs, args.repeat, args.image_size)
+
+    for shape, stages in results["shapes"].items():
+        print(f"{shape}:")
+        for stage, seconds in stages.items():
+            print(f"  {stage:<24}{seconds * 1000:10.2f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_results(results, baseline, args.threshold)
+    for shape, stage, before, after in regressions:
+        print(f"REGRESSION {shape}/{stage}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms", file=sys.stderr)
+    if regressions:
+        sys.exit(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
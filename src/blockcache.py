@@ -0,0 +1,143 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+# Modules whose source decides how a block renders
+PARSER_MODULES = ("markdown.py", "htmlnode.py", "textnode.py")
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    key TEXT PRIMARY KEY,
+    html TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used);
+CREATE TABLE IF NOT EXISTS stats (total INTEGER NOT NULL);
+INSERT INTO stats (total) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM stats);
+CREATE TRIGGER IF NOT EXISTS blocks_insert AFTER INSERT ON blocks
+    BEGIN UPDATE stats SET total = total + NEW.size; END;
+CREATE TRIGGER IF NOT EXISTS blocks_delete AFTER DELETE ON blocks
+    BEGIN UPDATE stats SET total = total - OLD.size; END;
+"""
+
+_parser_version = None
+
+
+def parser_version():
+    """Hash of the parser's source, so editing the parser invalidates the cache."""
+    global _parser_version
+    if _parser_version is None:
+        digest = hashlib.sha256()
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in PARSER_MODULES:
+            with open(os.path.join(src_dir, name), 'rb') as f:
+                digest.update(f.read())
+        _parser_version = digest.hexdigest()
+    return _parser_version
+
+
+class BlockCache:
+    """
+    On-disk cache of rendered HTML for single markdown blocks, stored in a
+    SQLite database and keyed on the block text and parser version.
+
+    New entries and hits are batched and written by flush(), which also
+    evicts the least recently used blocks once the cache is over max_bytes.
+    The connection is opened lazily, so a cache can be pickled and handed
+    to worker processes, each of which opens its own connection.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pending = {}
+        self._used = set()
+
+    def __getstate__(self):
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["max_bytes"])
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def key(self, block, variant=""):
+        """
+        Cache key for a block. variant separates renderings of the same
+        block that differ by context, such as the page's URL prefix.
+        """
+        return hashlib.sha256(f"{parser_version()}\0{variant}\0{block}".encode("utf-8")).hexdigest()
+
+    def get(self, block, variant=""):
+        """Return the cached HTML for a block, or None."""
+        key = self.key(block, variant)
+        html = self._pending.get(key)
+        if html is None:
+            row = self._connect().execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+            html = row[0] if row else None
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._used.add(key)
+        return html
+
+    def put(self, block, html, variant=""):
+        """Queue a block's rendered HTML to be stored on the next flush()."""
+        self._pending[self.key(block, variant)] = html
+
+    def flush(self):
+        """Write queued entries and hit times, then evict if over the size limit."""
+        if not self._pending and not self._used:
+            return
+        now = time.time()
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO blocks (key, html, size, used) VALUES (?, ?, ?, ?)",
+                ((key, html, len(html.encode("utf-8")), now) for key, html in self._pending.items()),
+            )
+            connection.executemany("UPDATE blocks SET used = ? WHERE key = ?",
+                                   ((now, key) for key in self._used))
+        self._pending.clear()
+        self._used.clear()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used blocks until the cache is under max_bytes."""
+        connection = self._connect()
+        with connection:
+            excess = connection.execute("SELECT total FROM stats").fetchone()[0] - self.max_bytes
+            if excess <= 0:
+                return
+            stale = []
+            for key, size in connection.execute("SELECT key, size FROM blocks ORDER BY used"):
+                stale.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            connection.executemany("DELETE FROM blocks WHERE key = ?", stale)
+
+    def total_bytes(self):
+        return self._connect().execute("SELECT total FROM stats").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
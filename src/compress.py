@@ -0,0 +1,110 @@
+import os
+import gzip
+import shutil
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from manifest import hash_file
+from tracing import log
+
+# Files worth serving precompressed; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".svg", ".txt", ".xml", ".json")
+
+
+class CompressStats:
+    """Counts of what precompression did, for the build summary."""
+
+    def __init__(self):
+        self.compressed = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return f"CompressStats(compressed={self.compressed}, unchanged={self.unchanged}, removed={self.removed})"
+
+
+def is_compressible(path):
+    return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+def gzip_file(path, level=9):
+    """
+    Write a gzip copy of path to path + ".gz", going through a temporary
+    file. The gzip header's timestamp is zeroed so the same input always
+    produces the same bytes.
+    """
+    gz_path = path + ".gz"
+    tmp_path = gz_path + ".tmp"
+    try:
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as raw:
+            with gzip.GzipFile(filename="", mode='wb', compresslevel=level, fileobj=raw, mtime=0) as dest:
+                shutil.copyfileobj(src, dest, 1 << 20)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, gz_path)
+    return gz_path
+
+def _needs_compressing(path, entry):
+    """
+    Return (stat, hash) for a file, with hash None if its .gz copy is still
+    current. Like page outputs, a file is only hashed when its size or
+    mtime differ from the manifest entry.
+    """
+    stat = os.stat(path)
+    if entry is None or not os.path.isfile(path + ".gz"):
+        return stat, hash_file(path)
+    if stat.st_size == entry["size"] and stat.st_mtime_ns == entry["mtime_ns"]:
+        return stat, None
+    content_hash = hash_file(path)
+    return stat, (None if content_hash == entry["hash"] else content_hash)
+
+def precompress_directory(root, manifest=None, jobs=1, level=9):
+    """
+    Write a .gz copy next to every HTML, CSS and text file under root.
+    With a manifest, files whose content hash is unchanged since the last
+    build keep their existing copy, and .gz files whose source is gone are
+    removed. Compression runs across jobs worker processes.
+    """
+    stats = CompressStats()
+    previous = manifest.compressed if manifest is not None else {}
+    current = {}
+    pending = []
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if not is_compressible(name):
+                continue
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, root)
+            stat, content_hash = _needs_compressing(path, previous.get(key))
+            if content_hash is None:
+                current[key] = dict(previous[key], size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                stats.unchanged += 1
+            else:
+                current[key] = {"hash": content_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                pending.append(path)
+
+    for path in pending:
+        log(f"Compressing file: {path}")
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(gzip_file, pending, itertools.repeat(level)))
+    else:
+        for path in pending:
+            gzip_file(path, level)
+    stats.compressed = len(pending)
+
+    # Remove copies we made of files that no longer exist
+    for key in previous:
+        if key in current:
+            continue
+        gz_path = os.path.join(root, key) + ".gz"
+        if os.path.isfile(gz_path):
+            log(f"Removing orphaned file: {gz_path}")
+            os.remove(gz_path)
+            stats.removed += 1
+
+    if manifest is not None:
+        manifest.compressed = current
+    return stats
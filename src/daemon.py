@@ -0,0 +1,78 @@
+import os
+import json
+import socket
+import contextlib
+
+# Where the daemon listens by default, under the repository root
+SOCKET_FILENAME = ".build-daemon.sock"
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+def _receive(sock_file):
+    """Read one newline terminated JSON message, or None at end of stream."""
+    line = sock_file.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+def _claim_socket(socket_path):
+    """Remove a socket left by a daemon that died, refusing if one is still listening."""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.remove(socket_path)
+            return
+    raise ValueError(f"A build daemon is already listening on {socket_path}")
+
+def serve(socket_path, handle):
+    """
+    Listen on a Unix socket and answer requests until a "stop" request.
+    Each request is one line of JSON with a "command", answered by one
+    line of JSON from handle(request). Connections are served one at a
+    time, so builds never overlap, and a client may send several requests
+    over one connection.
+    """
+    _claim_socket(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(socket_path)
+        server.listen()
+        stopping = False
+        while not stopping:
+            conn, _ = server.accept()
+            with conn, conn.makefile('rb') as sock_file:
+                try:
+                    while (request := _receive(sock_file)) is not None:
+                        if request.get("command") == "stop":
+                            _send(conn, {"ok": True, "output": "Daemon stopped\n", "errors": []})
+                            stopping = True
+                            break
+                        _send(conn, handle(request))
+                except ValueError as e:
+                    _send(conn, {"ok": False, "output": "", "errors": [], "error": f"Bad request: {e}"})
+                except OSError:
+                    # The client went away; wait for the next one
+                    pass
+    finally:
+        server.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(socket_path)
+
+def send_request(socket_path, request):
+    """Send one request to the daemon at socket_path and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            raise ValueError(f"No build daemon is listening on {socket_path}")
+        _send(sock, request)
+        with sock.makefile('rb') as sock_file:
+            response = _receive(sock_file)
+    if response is None:
+        raise ValueError("The build daemon closed the connection without answering")
+    return response
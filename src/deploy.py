@@ -0,0 +1,67 @@
+import os
+import json
+from manifest import hash_file
+
+DEPLOY_MANIFEST_VERSION = 1
+
+
+def scan_outputs(root, previous=None):
+    """
+    Return {path: {"size", "hash", "mtime_ns"}} for every file under root,
+    with "/" separated paths relative to root. Files whose size and mtime
+    match their entry in previous reuse its hash instead of being read.
+    """
+    previous = previous or {}
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, root).replace(os.sep, "/")
+            stat = os.stat(path)
+            entry = previous.get(key)
+            if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                content_hash = entry["hash"]
+            else:
+                content_hash = hash_file(path)
+            files[key] = {"size": stat.st_size, "hash": content_hash, "mtime_ns": stat.st_mtime_ns}
+    return files
+
+def diff_outputs(old, new):
+    """
+    Compare two scans and return {"added", "modified", "removed"}, each a
+    sorted list of paths. A file counts as modified only if its hash changed.
+    """
+    return {
+        "added": sorted(path for path in new if path not in old),
+        "modified": sorted(path for path in new if path in old and new[path]["hash"] != old[path]["hash"]),
+        "removed": sorted(path for path in old if path not in new),
+    }
+
+def load_deploy_manifest(path):
+    """Load the files recorded by a previous deploy manifest, or {} if there is none."""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != DEPLOY_MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+def write_deploy_manifest(root, path):
+    """
+    Record the size and hash of every file under root in a JSON manifest
+    at path, along with what was added, modified and removed since the
+    manifest previously written there. Upload tooling can read "delta" to
+    push only what changed. Returns the delta.
+    """
+    previous = load_deploy_manifest(path)
+    files = scan_outputs(root, previous)
+    delta = diff_outputs(previous, files)
+    data = {"version": DEPLOY_MANIFEST_VERSION, "root": root, "files": files, "delta": delta}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return delta
@@ -1,9 +1,29 @@
+class _EmptyProps(dict):
+    """Read-only empty props, shared by every node created without props."""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Shared empty props are read-only; assign a new dict instead")
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __reduce__(self):
+        # Unpickle to the shared instance rather than a new copy
+        return "EMPTY_PROPS"
+
+EMPTY_PROPS = _EmptyProps()
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag = None, value = None, children = None, props = None):
         self.tag = tag
         self.value = value
         self.children = children if children else []
-        self.props = props if props else {}
+        self.props = props if props else EMPTY_PROPS
     
     #def __str__(self):
     #    attrs = " ".join(f'{key}="{value}"' for key, value in self.props.items())
@@ -14,27 +34,47 @@ class HTMLNode:
     def __eq__(self, other):
         if not isinstance(other, HTMLNode):
             return False
+        # Leaves keep an empty tuple for children, which should still equal []
         return (self.tag == other.tag and
                 self.value == other.value and
-                self.children == other.children and
+                (self.children == other.children or not (self.children or other.children)) and
                 self.props == other.props)
     
     def to_html(self) -> str:
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self):
+        """Yield the node's HTML in chunks instead of building one string."""
+        yield self.to_html()
+
+    def write_html(self, stream):
+        """Write the node's HTML to a text stream chunk by chunk."""
+        stream.writelines(self.iter_html())
+
     def props_to_html(self) -> str:
         if not self.props:
             return ""
         return " " + " ".join(f'{key}="{value}"' for key, value in self.props.items())
     
     def __repr__(self):
-        return f"HTMLNode(tag={self.tag}, value={self.value}, props={self.props}, children={self.children})"
+        return f"HTMLNode(tag={self.tag}, value={self.value}, props={dict(self.props)}, children={list(self.children)})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
+    # Leaves never have children, so they share one empty tuple instead of
+    # each allocating an empty list
+    children = ()
+
     def __init__(self, tag: str, value: str, props = None):
-        super().__init__(tag=tag, value=value, children=None, props=props)
-        
+        self.tag = tag
+        self.value = value
+        self.props = props if props else EMPTY_PROPS
+
+    def __reduce__(self):
+        # The default slot state would try to restore the shared children
+        return (type(self), (self.tag, self.value, self.props or None))
     
     def to_html(self) -> str:
         if self.value is None:
@@ -48,19 +88,35 @@ class LeafNode(HTMLNode):
             
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list, props = None):
         super().__init__(tag=tag, value=None, children=children, props=props)
     
     def to_html(self) -> str:
-        if self.tag is None:
-            raise ValueError("ParentNode must have a tag")
-        
-        if not self.children:
-            raise ValueError("ParentNode must have children")
-        
-        props_str = self.props_to_html()
-        children_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{props_str}>{children_html}</{self.tag}>"
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Walk the tree with an explicit stack so each tag is produced once,
+        # rather than being copied into every ancestor's string
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                # Closing tag pushed when its parent was opened
+                yield item
+            elif isinstance(item, ParentNode):
+                if item.tag is None:
+                    raise ValueError("ParentNode must have a tag")
+                
+                if not item.children:
+                    raise ValueError("ParentNode must have children")
+                
+                yield f"<{item.tag}{item.props_to_html()}>"
+                stack.append(f"</{item.tag}>")
+                stack.extend(reversed(item.children))
+            else:
+                yield from item.iter_html()
 
 class HTMLTags:
     DIV = "div"
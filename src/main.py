@@ -1,18 +1,52 @@
 import os
 import sys
 import shutil
-from markdown import markdown_to_html_node, extract_title
+import io
+import gzip
+import itertools
+import collections
+import argparse
+import hashlib
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from markdown import extract_title_from_lines
+from manifest import BuildManifest, HashingWriter, hash_file, MANIFEST_FILENAME
+from sync import sync_directory, copy_file, replace_if_changed, WriteStats
+from walk import walk_files, iter_pages, iter_assets, parse_shard
+from shard import shard_dir, merge_shards
+from template import load_template
+from render import make_url_rewriter, path_prefix_for, render_page
+from watch import watch, snapshot
+from blockcache import BlockCache
+from pagecache import PageCache
+from compress import precompress_directory, is_compressible
+from pipeline import generate_pages_pipelined, DEFAULT_IO_THREADS
+from deploy import write_deploy_manifest
+from daemon import serve, send_request, SOCKET_FILENAME
+from tracing import Tracer, get_tracer, set_tracer, set_quiet, is_quiet, log
 
-def copy_static_to_public(src_dir="static", dest_dir="docs"):
+def copy_static_to_public(src_dir="static", dest_dir="docs", clean=True, keep=None, compare="mtime", link=False,
+                          include=None, exclude=None, shard=None):
     """
     Recursively copy all contents from static directory to docs directory.
-    Deletes existing docs directory first to ensure clean copy.
+    Deletes existing docs directory first to ensure clean copy. When clean
+    is False the directories are synced instead: only changed files are
+    copied and orphans are removed, except those matched by keep. include
+    and exclude are glob lists that select which static files are used, and
+    shard an (i, N) pair that narrows them to one shard.
     """
     # Get absolute paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     src_path = os.path.join(base_dir, src_dir)
     dest_path = os.path.join(base_dir, dest_dir)
     
+    if not clean:
+        stats = sync_directory(src_path, dest_path, keep=keep, compare=compare, link=link,
+                               include=include, exclude=exclude, shard=shard)
+        print(f"Synced {src_dir} to {dest_dir}: {stats.copied} copied, "
+              f"{stats.unchanged} unchanged, {stats.removed} removed")
+        return stats
+    
     # Delete destination directory if it exists
     if os.path.exists(dest_path):
         print(f"Deleting existing {dest_dir} directory...")
@@ -23,128 +57,780 @@ def copy_static_to_public(src_dir="static", dest_dir="docs"):
     os.makedirs(dest_path)
     
     # Recursively copy contents
-    _copy_directory_contents(src_path, dest_path)
+    _copy_directory_contents(src_path, dest_path, include, exclude, shard)
     
     print(f"Successfully copied all contents from {src_dir} to {dest_dir}")
 
-def _copy_directory_contents(src, dest):
+def _copy_directory_contents(src, dest, include=None, exclude=None, shard=None):
     """
-    Helper function to recursively copy directory contents.
+    Helper function to copy directory contents, walking src with scandir
+    rather than recursing.
     """
     if not os.path.exists(src):
         raise ValueError(f"Source directory {src} does not exist")
     
-    # List all items in source directory
-    items = os.listdir(src)
-    
-    for item in items:
-        src_item = os.path.join(src, item)
-        dest_item = os.path.join(dest, item)
-        
-        if os.path.isfile(src_item):
-            # Copy file
-            print(f"Copying file: {src_item} -> {dest_item}")
-            shutil.copy2(src_item, dest_item)
-        elif os.path.isdir(src_item):
-            # Create directory and recursively copy its contents
-            print(f"Creating directory: {dest_item}")
-            os.makedirs(dest_item, exist_ok=True)
-            _copy_directory_contents(src_item, dest_item)
-
-def generate_page(from_path, template_path, dest_path, base_dir=None):
+    # Directories already created, so each is only made once
+    created = {dest}
+    for src_item, dest_item, _ in iter_assets(src, dest, include, exclude, shard):
+        dest_dir = os.path.dirname(dest_item)
+        if dest_dir not in created:
+            log(f"Creating directory: {dest_dir}")
+            os.makedirs(dest_dir, exist_ok=True)
+            created.add(dest_dir)
+        log(f"Copying file: {src_item} -> {dest_item}")
+        shutil.copy2(src_item, dest_item)
+
+def _scan_markdown(from_path):
     """
-    Generate an HTML page from markdown content using a template.
+    Read a markdown file line by line, returning the hash of its contents
+    and its title.
     """
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    digest = hashlib.sha256()
+    
+    def hashed_lines(f):
+        for line in f:
+            digest.update(line.encode("utf-8"))
+            yield line
     
-    # Read markdown file
     with open(from_path, 'r') as f:
-        markdown_content = f.read()
+        lines = hashed_lines(f)
+        title = extract_title_from_lines(lines)
+        # Finish hashing the rest of the file
+        for _ in lines:
+            pass
+    return digest.hexdigest(), title
+
+def generate_page(from_path, template_path, dest_path, base_dir=None, manifest=None, block_cache=None,
+                  page_cache=None):
+    """
+    Generate an HTML page from markdown content using a template.
+    When a manifest is given, the page is skipped if its source, template
+    and output are unchanged since the last build. A page cache hit is
+    copied instead of rendered, and with a block cache only blocks that are
+    not already cached are parsed. The output file is only replaced if its
+    bytes changed. Returns True if the page was written.
+    """
+    with get_tracer().page(from_path):
+        written = _generate_page(from_path, template_path, dest_path, base_dir, manifest, block_cache, page_cache)
+    if block_cache is not None:
+        block_cache.flush()
+    return written
+
+def _generate_page(from_path, template_path, dest_path, base_dir, manifest, block_cache, page_cache):
+    tracer = get_tracer()
     
-    # Read template file
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+    # Hash the markdown file and find its title without reading it all into memory
+    with tracer.span("read"):
+        source_hash, title = _scan_markdown(from_path)
     
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+    # Skip pages whose inputs and output match the manifest
+    if manifest is not None:
+        manifest_key = os.path.relpath(dest_path, base_dir) if base_dir else dest_path
+        template_hash = manifest.template_hash(template_path)
+        if manifest.is_fresh(manifest_key, source_hash, template_hash, dest_path):
+            log(f"Skipping unchanged page {from_path}")
+            return False
     
-    # Extract title
-    title = extract_title(markdown_content)
+    log(f"Generating page from {from_path} to {dest_path} using {template_path}")
     
     # Calculate relative path to root based on directory depth
     if base_dir:
-        # Get relative path from dest to docs root
-        dest_dir = os.path.dirname(dest_path)
-        rel_path = os.path.relpath(base_dir, dest_dir)
-        if rel_path == '.':
-            path_prefix = './'
-        else:
-            path_prefix = rel_path + '/'
+        path_prefix = path_prefix_for(base_dir, os.path.dirname(dest_path))
     else:
         path_prefix = './'
     
-    # Replace placeholders in template
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
-    
-    # Fix absolute paths to use relative paths (works for both local and GitHub Pages)
-    final_html = final_html.replace('href="/', f'href="{path_prefix}')
-    final_html = final_html.replace('src="/', f'src="{path_prefix}')
+    # Finished pages are shared by every build with the same inputs
+    html = None
+    if page_cache is not None:
+        if manifest is None:
+            template_hash = hash_file(template_path)
+        cache_key = page_cache.key(source_hash, template_hash, path_prefix)
+        with tracer.span("page_cache"):
+            html = page_cache.get(cache_key)
     
-    # Fix relative CSS path from template
-    final_html = final_html.replace('href="./index.css"', f'href="{path_prefix}index.css"')
+    # Compiled once and reused for every page that shares the template
+    if html is None:
+        with tracer.span("template"):
+            template = load_template(template_path)
     
     # Create destination directory if it doesn't exist
     dest_dir = os.path.dirname(dest_path)
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
     
-    # Write to destination file
-    with open(dest_path, 'w') as f:
-        f.write(final_html)
+    # Render into a temporary file so an error never leaves a half-written page
+    tmp_path = dest_path + ".tmp"
+    try:
+        with tracer.span("render"), open(tmp_path, 'w') as f:
+            writer = HashingWriter(f)
+            if html is not None:
+                writer.write(html)
+            else:
+                with open(from_path, 'r') as source:
+                    render_page(source, template, title, path_prefix, writer, block_cache)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    # Leave identical output untouched so its mtime doesn't change
+    written = replace_if_changed(tmp_path, dest_path, writer.hexdigest())
+    if page_cache is not None and html is None:
+        page_cache.put_file(cache_key, dest_path)
     
-    print(f"Page generated successfully!")
+    if manifest is not None:
+        manifest.record(manifest_key, from_path, source_hash, template_path, template_hash,
+                        dest_path, writer.hexdigest())
+    
+    if written:
+        log(f"Page generated successfully!")
+    else:
+        log(f"Page unchanged: {dest_path}")
+    return written
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path_root, docs_root=None):
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path_root, docs_root=None, manifest=None,
+                             block_cache=None, stats=None, include=None, exclude=None, shard=None, page_cache=None):
     """
-    Recursively generate HTML pages from all markdown files in a directory.
-    Maintains the directory structure in the destination.
+    Generate HTML pages from all markdown files under a directory, taking
+    each page from the walker as it is found. Maintains the directory
+    structure in the destination. Written and unchanged pages are counted
+    in stats, a WriteStats, if given.
     """
     # Track the docs root directory for calculating relative paths
     if docs_root is None:
         docs_root = dest_dir_path_root
     
-    # List all items in the content directory
-    for item in os.listdir(dir_path_content):
-        src_item_path = os.path.join(dir_path_content, item)
-        dest_item_path = os.path.join(dest_dir_path_root, item)
+    for from_path, dest_path in iter_pages(dir_path_content, dest_dir_path_root, include, exclude, shard):
+        written = generate_page(from_path, template_path, dest_path, base_dir=docs_root,
+                                manifest=manifest, block_cache=block_cache, page_cache=page_cache)
+        if stats is not None:
+            stats.count(written)
+
+def discover_pages(dir_path_content, dest_dir_path_root, include=None, exclude=None, shard=None):
+    """
+    Walk the content directory and return (markdown path, html path) pairs
+    for every page, in a stable sorted order.
+    """
+    return list(iter_pages(dir_path_content, dest_dir_path_root, include, exclude, shard))
+
+# Block caches opened by this worker process, by path
+_worker_block_caches = {}
+
+# Pages submitted to each worker ahead of the one it is rendering
+PAGES_PER_WORKER = 4
+
+def _generate_page_job(from_path, template_path, dest_path, base_dir, manifest, block_cache, page_cache, quiet,
+                       trace):
+    """
+    Worker entry point for generate_pages_parallel. Returns whether the
+    page was written, along with its manifest and tracer so the parent can
+    merge what the worker recorded.
+    """
+    set_quiet(quiet)
+    tracer = Tracer() if trace else None
+    set_tracer(tracer)
+    if block_cache is not None:
+        # Reuse one connection per worker process rather than one per page
+        block_cache = _worker_block_caches.setdefault(block_cache.path, block_cache)
+    written = generate_page(from_path, template_path, dest_path, base_dir=base_dir, manifest=manifest,
+                            block_cache=block_cache, page_cache=page_cache)
+    return written, manifest, tracer
+
+def generate_pages_parallel(dir_path_content, template_path, dest_dir_path_root, jobs, manifest=None,
+                            block_cache=None, stats=None, include=None, exclude=None, shard=None, page_cache=None):
+    """
+    Parse and render pages across a pool of worker processes as the walker
+    finds them, keeping at most a few pages per worker queued so huge
+    content trees are never held in memory at once. Results are collected
+    in discovery order, and a failing page does not stop the rest of the
+    build. Written and unchanged pages are counted in stats, a WriteStats,
+    if given.
+    Returns a list of (markdown path, exception) pairs for failed pages.
+    """
+    tracer = get_tracer()
+    
+    # Hash the template once here instead of once per worker
+    if manifest is not None:
+        manifest.template_hash(template_path)
+    
+    errors = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pages = iter_pages(dir_path_content, dest_dir_path_root, include, exclude, shard)
+        futures = collections.deque()
+        while True:
+            # Top up the queue of submitted pages, then collect the oldest
+            for from_path, dest_path in itertools.islice(pages, jobs * PAGES_PER_WORKER - len(futures)):
+                key = os.path.relpath(dest_path, dest_dir_path_root)
+                page_manifest = manifest.subset(key) if manifest is not None else None
+                future = executor.submit(_generate_page_job, from_path, template_path, dest_path,
+                                         dest_dir_path_root, page_manifest, block_cache, page_cache, is_quiet(),
+                                         tracer.enabled)
+                futures.append((from_path, key, future))
+            if not futures:
+                break
+            from_path, key, future = futures.popleft()
+            try:
+                written, page_manifest, page_tracer = future.result()
+            except Exception as e:
+                errors.append((from_path, e))
+                # Keep the previous entry so its output is not pruned
+                if manifest is not None:
+                    manifest.keep(key)
+                continue
+            if stats is not None:
+                stats.count(written)
+            if manifest is not None:
+                manifest.merge(page_manifest)
+            if page_tracer is not None:
+                tracer.merge(page_tracer)
+    return errors
+
+def remove_stale_pages(manifest, docs_root):
+    """
+    Delete outputs of pages whose markdown source no longer exists.
+    Only files that still hold the HTML we generated are removed.
+    """
+    for key, entry in manifest.prune().items():
+        _remove_page_output(docs_root, key, entry)
+
+def _remove_page_output(docs_root, key, entry):
+    dest_path = os.path.join(docs_root, key)
+    if os.path.isfile(dest_path) and hash_file(dest_path) == entry["output_hash"]:
+        log(f"Removing stale page: {dest_path}")
+        os.remove(dest_path)
+
+def rebuild_changes(changed, removed, base_dir, manifest, link=False, block_cache=None, precompress=False,
+                    page_cache=None):
+    """
+    Rebuild only what a set of changed and removed source files affects:
+    edited pages are regenerated, a template edit regenerates the pages
+    whose manifest entries used it, and static files are copied or removed
+    one by one. With precompress, .gz copies are brought up to date too.
+    Returns a list of (markdown path, exception) pairs for failed pages.
+    """
+    content_dir = os.path.join(base_dir, "content")
+    static_dir = os.path.join(base_dir, "static")
+    template_path = os.path.join(base_dir, "template.html")
+    docs_root = os.path.join(base_dir, "docs")
+    
+    # Pages to regenerate, markdown path -> html path
+    pages = {}
+    for path in changed:
+        if path == template_path:
+            manifest.forget_template_hashes()
+            for key, entry in manifest.pages.items():
+                if entry["template"] == template_path:
+                    pages[entry["source"]] = os.path.join(docs_root, key)
+        elif path.startswith(content_dir + os.sep) and path.endswith('.md'):
+            pages[path] = os.path.join(docs_root, os.path.relpath(path, content_dir)).replace('.md', '.html')
+        elif path.startswith(static_dir + os.sep):
+            dest_path = os.path.join(docs_root, os.path.relpath(path, static_dir))
+            log(f"Copying file: {path} -> {dest_path}")
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            copy_file(path, dest_path, os.path.getsize(path), link=link)
+    
+    for path in removed:
+        if path.startswith(content_dir + os.sep) and path.endswith('.md'):
+            dest_path = os.path.join(docs_root, os.path.relpath(path, content_dir)).replace('.md', '.html')
+            key = os.path.relpath(dest_path, docs_root)
+            pages.pop(path, None)
+            entry = manifest.remove(key)
+            if entry is not None:
+                _remove_page_output(docs_root, key, entry)
+        elif path.startswith(static_dir + os.sep):
+            dest_path = os.path.join(docs_root, os.path.relpath(path, static_dir))
+            if os.path.isfile(dest_path):
+                log(f"Removing file: {dest_path}")
+                os.remove(dest_path)
+    
+    errors = []
+    for from_path, dest_path in sorted(pages.items()):
+        try:
+            generate_page(from_path, template_path, dest_path, base_dir=docs_root, manifest=manifest,
+                          block_cache=block_cache, page_cache=page_cache)
+        except Exception as e:
+            # Keep watching; the page is retried on its next save
+            print(f"Error generating {from_path}: {e}", file=sys.stderr)
+            errors.append((from_path, e))
+    
+    if precompress:
+        precompress_directory(docs_root, manifest)
+    manifest.save()
+    return errors
+
+class MemoryOutput(dict):
+    """
+    Build target that keeps the site in memory as a dict of output path to
+    bytes, with "/" separated paths such as "blog/index.html".
+    """
+
+
+class BuildConfig:
+    """
+    Settings for build_site(). Paths default to the repository layout:
+    content/, static/ and template.html under base_dir, built into docs/.
+    output is a directory path, or a MemoryOutput to build without writing
+    anything to disk. include and exclude are glob lists that select which
+    content and static files are built. shard, an (i, N) pair, builds only
+    the files of that shard, for merging with the others afterwards.
+    deploy_manifest, for directory builds, is where to record every output
+    file and what changed since the last build.
+    """
+
+    def __init__(self, base_dir=None, content_dir=None, static_dir=None, template_path=None, output=None,
+                 manifest_path=None, full=False, compare="mtime", link=False, jobs=1, block_cache=None, page_cache=None,
+                 gzip=False, pipeline=False, io_threads=DEFAULT_IO_THREADS, deploy_manifest=None, include=None,
+                 exclude=None, shard=None):
+        if base_dir is None:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.base_dir = os.path.abspath(base_dir)
+        self.content_dir = os.path.abspath(content_dir or os.path.join(self.base_dir, "content"))
+        self.static_dir = os.path.abspath(static_dir or os.path.join(self.base_dir, "static"))
+        self.template_path = os.path.abspath(template_path or os.path.join(self.base_dir, "template.html"))
+        if output is None:
+            output = os.path.join(self.base_dir, "docs")
+        self.output = output if isinstance(output, MemoryOutput) else os.path.abspath(output)
+        if manifest_path is None and not self.in_memory:
+            # Next to the output directory, so docs/ keeps the repository's manifest
+            manifest_path = os.path.join(os.path.dirname(self.output), MANIFEST_FILENAME)
+        self.manifest_path = manifest_path
+        self.full = full
+        self.compare = compare
+        self.link = link
+        self.jobs = jobs
+        self.block_cache = block_cache
+        self.page_cache = page_cache
+        self.gzip = gzip
+        self.pipeline = pipeline
+        self.io_threads = io_threads
+        self.deploy_manifest = deploy_manifest
+        self.include = include
+        self.exclude = exclude
+        self.shard = shard
+
+    @property
+    def in_memory(self):
+        return isinstance(self.output, MemoryOutput)
+
+
+class BuildResult:
+    """
+    What build_site() produced: the output, the manifest, any page errors,
+    a WriteStats of how many pages were written or left unchanged, and the
+    files added, modified and removed if a deploy manifest was written.
+    """
+
+    def __init__(self, output, manifest=None, errors=None, stats=None, delta=None):
+        self.output = output
+        self.manifest = manifest
+        self.errors = errors if errors else []
+        self.stats = stats
+        self.delta = delta
+
+
+def build_site(config):
+    """
+    Build the site described by a BuildConfig and return a BuildResult.
+    A directory build is incremental through the build manifest unless
+    config.full is set; an in-memory build renders every page into
+    config.output. Compiled templates and the block cache stay warm between
+    calls, so a long running process can rebuild cheaply.
+    """
+    if config.in_memory:
+        return _build_in_memory(config)
+    
+    # A full build starts from an empty manifest and a clean output directory
+    if config.full:
+        manifest = BuildManifest(config.manifest_path)
+    else:
+        manifest = BuildManifest.load(config.manifest_path)
+    manifest.shard = config.shard
+    
+    def keep(path):
+        # Generated pages and .gz copies are not in static/ but must survive the
+        # sync; without gzip, copies left by an earlier build are removed
+        if config.gzip and path.endswith(".gz") and path[:-3] in manifest.compressed:
+            return True
+        return path in manifest.pages
+    
+    # Copy static files, leaving generated pages in place unless rebuilding fully
+    with get_tracer().span("static"):
+        copy_static_to_public(src_dir=config.static_dir, dest_dir=config.output, clean=config.full, keep=keep,
+                              compare=config.compare, link=config.link, include=config.include,
+                              exclude=config.exclude, shard=config.shard)
+    
+    errors = []
+    stats = WriteStats()
+    if config.pipeline:
+        pages = iter_pages(config.content_dir, config.output, config.include, config.exclude, config.shard)
+        errors = generate_pages_pipelined(pages, config.template_path, config.output, manifest=manifest,
+                                          block_cache=config.block_cache, page_cache=config.page_cache,
+                                          jobs=config.jobs, io_threads=config.io_threads, stats=stats)
+    elif config.jobs == 1:
+        # Generate all pages recursively from content directory
+        generate_pages_recursive(config.content_dir, config.template_path, config.output, manifest=manifest,
+                                 block_cache=config.block_cache, page_cache=config.page_cache, stats=stats,
+                                 include=config.include, exclude=config.exclude, shard=config.shard)
+    else:
+        errors = generate_pages_parallel(config.content_dir, config.template_path, config.output, config.jobs,
+                                         manifest=manifest, block_cache=config.block_cache,
+                                         page_cache=config.page_cache, stats=stats,
+                                         include=config.include, exclude=config.exclude, shard=config.shard)
+    print(f"Generated pages: {stats.written} written, {stats.unchanged} unchanged")
+    
+    # Save what did build so the next run only retries failed pages
+    remove_stale_pages(manifest, config.output)
+    if config.gzip:
+        with get_tracer().span("compress"):
+            stats = precompress_directory(config.output, manifest, jobs=config.jobs)
+        print(f"Precompressed output: {stats.compressed} compressed, "
+              f"{stats.unchanged} unchanged, {stats.removed} removed")
+    else:
+        manifest.compressed = {}
+    manifest.save()
+    
+    delta = None
+    if config.deploy_manifest:
+        with get_tracer().span("deploy_manifest"):
+            delta = write_deploy_manifest(config.output, config.deploy_manifest)
+        print(f"Deploy delta: {len(delta['added'])} added, {len(delta['modified'])} modified, "
+              f"{len(delta['removed'])} removed (written to {config.deploy_manifest})")
+    return BuildResult(config.output, manifest, errors, stats, delta)
+
+def _build_in_memory(config):
+    """Render the whole site into config.output, replacing what it held."""
+    tracer = get_tracer()
+    output = config.output
+    output.clear()
+    errors = []
+    
+    with tracer.span("static"):
+        for path, rel_path, _ in walk_files(config.static_dir, config.include, config.exclude, config.shard):
+            with open(path, 'rb') as f:
+                output[rel_path] = f.read()
+    
+    for from_path, dest_path in iter_pages(config.content_dir, "", config.include, config.exclude, config.shard):
+        try:
+            with tracer.page(from_path):
+                with tracer.span("read"):
+                    _, title = _scan_markdown(from_path)
+                with tracer.span("template"):
+                    template = load_template(config.template_path)
+                path_prefix = path_prefix_for(".", os.path.dirname(dest_path) or ".")
+                buffer = io.StringIO()
+                with tracer.span("render"), open(from_path, 'r') as source:
+                    render_page(source, template, title, path_prefix, buffer, config.block_cache)
+        except Exception as e:
+            errors.append((from_path, e))
+            continue
+        finally:
+            if config.block_cache is not None:
+                config.block_cache.flush()
+        log(f"Generated page {dest_path} from {from_path}")
+        output[dest_path.replace(os.sep, "/")] = buffer.getvalue().encode("utf-8")
+    
+    if config.gzip:
+        with tracer.span("compress"):
+            for path in [path for path in output if is_compressible(path)]:
+                output[path + ".gz"] = gzip.compress(output[path], compresslevel=9, mtime=0)
+    return BuildResult(output, errors=errors)
+
+class BuildDaemon:
+    """
+    Build state kept warm between the daemon's requests: the config and its
+    open block and page caches, and the manifest of the last build, so a
+    rebuild only touches the paths it is given. Compiled templates and URL
+    rewriters stay cached in the process as well.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.manifest = None
+        self.requests = 0
+
+    def handle(self, request):
+        """
+        Answer one request from the client. The response holds everything
+        the request printed as "output", and failed pages as "errors", a
+        list of [markdown path, message] pairs.
+        """
+        command = request.get("command")
+        handler = {"build": self._build, "rebuild": self._rebuild, "status": self._status}.get(command)
+        if handler is None:
+            return {"ok": False, "output": "", "errors": [], "error": f"Unknown command {command!r}"}
         
-        if os.path.isfile(src_item_path):
-            # If it's a markdown file, generate HTML
-            if item.endswith('.md'):
-                # Replace .md with .html for destination
-                dest_html_path = dest_item_path.replace('.md', '.html')
-                # Pass the root docs directory for path calculation
-                generate_page(src_item_path, template_path, dest_html_path, base_dir=docs_root)
-        elif os.path.isdir(src_item_path):
-            # If it's a directory, create corresponding directory and recurse
-            os.makedirs(dest_item_path, exist_ok=True)
-            generate_pages_recursive(src_item_path, template_path, dest_item_path, docs_root)
-
-def main():
-    # Get base directory
+        buffer = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+                errors = handler(request)
+        except Exception as e:
+            # A broken build must not take the daemon down with it
+            print(f"{command}: failed: {e}")
+            return {"ok": False, "output": buffer.getvalue(), "errors": [], "error": str(e)}
+        self.requests += 1
+        print(f"{command}: {len(errors)} error(s)")
+        return {"ok": not errors, "output": buffer.getvalue(),
+                "errors": [[from_path, str(error)] for from_path, error in errors]}
+
+    def _build(self, request):
+        self.config.full = bool(request.get("full"))
+        result = build_site(self.config)
+        self.manifest = result.manifest
+        for from_path, error in result.errors:
+            print(f"Error generating {from_path}: {error}", file=sys.stderr)
+        self._trim_caches()
+        return result.errors
+
+    def _rebuild(self, request):
+        if self.manifest is None:
+            self.manifest = BuildManifest.load(self.config.manifest_path)
+        changed, removed = [], []
+        for path in request.get("paths", []):
+            path = os.path.abspath(path)
+            if os.path.exists(path):
+                # A directory stands for every file in it
+                changed.extend(snapshot(path))
+            else:
+                removed.append(path)
+        errors = rebuild_changes(sorted(changed), removed, self.config.base_dir, self.manifest,
+                                 link=self.config.link, block_cache=self.config.block_cache,
+                                 precompress=self.config.gzip, page_cache=self.config.page_cache)
+        print(f"Rebuilt {len(changed)} changed and {len(removed)} removed file(s)")
+        self._trim_caches()
+        return errors
+
+    def _status(self, request):
+        pages = len(self.manifest.pages) if self.manifest is not None else 0
+        print(f"Daemon for {self.config.base_dir}: {self.requests} request(s) served, {pages} page(s) built")
+        for name, cache in (("Block", self.config.block_cache), ("Page", self.config.page_cache)):
+            if cache is not None:
+                print(f"{name} cache: {cache.hits} hits, {cache.misses} misses")
+        return []
+
+    def _trim_caches(self):
+        if self.config.page_cache is not None:
+            self.config.page_cache.evict()
+
+def _shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def _add_build_options(parser):
+    """Options shared by a one-off build and the build daemon."""
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the build manifest and rebuild every page from scratch")
+    parser.add_argument("--compare", choices=["mtime", "hash"], default="mtime",
+                        help="how static files are compared when syncing (default: mtime)")
+    parser.add_argument("--hardlink", action="store_true",
+                        help="hardlink static files into docs/ instead of copying them")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes for rendering pages (0 = one per CPU)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="overlap reading, rendering and writing pages; rendering uses --jobs processes when > 1")
+    parser.add_argument("--io-threads", type=int, default=DEFAULT_IO_THREADS,
+                        help=f"reader and writer threads in pipeline mode (default: {DEFAULT_IO_THREADS})")
+    parser.add_argument("--block-cache", metavar="PATH",
+                        help="cache rendered markdown blocks in a database at PATH, so only changed blocks are parsed")
+    parser.add_argument("--block-cache-size", type=int, default=256, metavar="MB",
+                        help="size limit of the block cache before least recently used blocks are evicted (default: 256)")
+    parser.add_argument("--gzip", action="store_true",
+                        help="write a precompressed .gz copy next to every HTML, CSS and text file in docs/")
+    parser.add_argument("--deploy-manifest", metavar="FILE",
+                        help="write the size and hash of every file in docs/, and what changed since the last "
+                             "build that wrote FILE, as JSON")
+    parser.add_argument("--page-cache", metavar="DIR",
+                        help="reuse finished pages from a content-addressed cache in DIR, which may be shared "
+                             "between machines, and add newly rendered pages to it")
+    parser.add_argument("--page-cache-size", type=int, default=1024, metavar="MB",
+                        help="size limit of the page cache before least recently used pages are evicted "
+                             "(default: 1024)")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                        help="don't print a line for every page and file")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    _add_build_options(parser)
+    parser.add_argument("--output", metavar="DIR",
+                        help="build into DIR instead of docs/; the build manifest is kept next to DIR")
+    parser.add_argument("--shard", type=_shard_arg, metavar="I/N",
+                        help="build only shard I of N, into shards/I-of-N/docs unless --output is given; "
+                             "combine the shards with the merge command")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only build content and static files matching GLOB, may be repeated")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+                        help="skip content and static files or directories matching GLOB, may be repeated")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record per-stage timings and write them as a Chrome trace_event JSON file")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of slowest pages to summarize when tracing (default: 10)")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, watch content/, static/ and template.html and rebuild on change")
+    parser.add_argument("--interval", type=float, default=0.2,
+                        help="seconds between polls in watch mode (default: 0.2)")
+    args = parser.parse_args(argv)
+    if args.watch and (args.shard or args.output):
+        parser.error("--watch only works for a whole build into docs/")
+    return args
+
+def parse_daemon_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py daemon",
+                                     description="Build the site, then keep rebuilding it on request from "
+                                                 "main.py client without restarting.")
+    _add_build_options(parser)
+    parser.add_argument("--socket", metavar="PATH",
+                        help=f"Unix socket to listen on (default: {SOCKET_FILENAME} in the repository)")
+    return parser.parse_args(argv)
+
+def parse_client_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py client", description="Send a request to a running build daemon.")
+    parser.add_argument("--socket", metavar="PATH",
+                        help=f"the daemon's Unix socket (default: {SOCKET_FILENAME} in the repository)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build the site incrementally")
+    build.add_argument("--full", action="store_true", help="rebuild every page from scratch")
+    rebuild = commands.add_parser("rebuild", help="rebuild only what the given source files affect")
+    rebuild.add_argument("paths", nargs="+", metavar="PATH",
+                         help="changed or removed files under content/ or static/, or template.html")
+    commands.add_parser("status", help="show what the daemon has built and its cache counts")
+    commands.add_parser("stop", help="stop the daemon")
+    return parser.parse_args(argv)
+
+def parse_merge_args(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py merge",
+                                     description="Combine the outputs of a sharded build into docs/.")
+    parser.add_argument("shards", nargs="*", metavar="SHARD_DIR",
+                        help="shard directories holding docs/ and a build manifest (default: shards/*)")
+    parser.add_argument("--output", metavar="DIR", help="merge into DIR instead of docs/")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                        help="don't print a line for every file")
+    return parser.parse_args(argv)
+
+def merge(argv=None):
+    """The merge command: check the shards of a build and combine them."""
+    args = parse_merge_args(argv)
+    set_quiet(args.quiet)
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    shards = args.shards
+    if not shards:
+        shards_root = os.path.join(base_dir, "shards")
+        shards = [os.path.join(shards_root, name) for name in sorted(os.listdir(shards_root))] \
+            if os.path.isdir(shards_root) else []
+    output = os.path.abspath(args.output or os.path.join(base_dir, "docs"))
+    try:
+        stats = merge_shards(shards, output, os.path.join(os.path.dirname(output), MANIFEST_FILENAME))
+    except ValueError as e:
+        sys.exit(f"Merge failed: {e}")
+    print(f"Merged {len(shards)} shard(s) into {output}: {stats.copied} copied, "
+          f"{stats.unchanged} unchanged, {stats.removed} removed")
+
+def _open_caches(args):
+    """The block and page caches asked for on the command line, or None."""
+    block_cache = None
+    if args.block_cache:
+        block_cache = BlockCache(args.block_cache, max_bytes=args.block_cache_size * 1024 * 1024)
+    page_cache = None
+    if args.page_cache:
+        page_cache = PageCache(args.page_cache, max_bytes=args.page_cache_size * 1024 * 1024)
+    return block_cache, page_cache
+
+def daemon(argv=None):
+    """The daemon command: build once, then serve build requests until stopped."""
+    args = parse_daemon_args(argv)
+    set_quiet(args.quiet)
+    block_cache, page_cache = _open_caches(args)
+    config = BuildConfig(full=args.full, compare=args.compare, link=args.hardlink,
+                         jobs=args.jobs if args.jobs > 0 else os.cpu_count(),
+                         block_cache=block_cache, page_cache=page_cache, gzip=args.gzip, pipeline=args.pipeline,
+                         io_threads=args.io_threads, deploy_manifest=args.deploy_manifest)
+    build_daemon = BuildDaemon(config)
+    response = build_daemon.handle({"command": "build", "full": args.full})
+    print(response["output"], end="")
+    
+    socket_path = args.socket or os.path.join(config.base_dir, SOCKET_FILENAME)
+    print(f"Listening on {socket_path} (Ctrl+C to stop)...")
+    try:
+        serve(socket_path, build_daemon.handle)
+    except ValueError as e:
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if block_cache is not None:
+            block_cache.close()
+
+def client(argv=None):
+    """The client command: send one request to the daemon and print what it did."""
+    args = parse_client_args(argv)
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    socket_path = args.socket or os.path.join(base_dir, SOCKET_FILENAME)
+    request = {"command": args.command}
+    if args.command == "build":
+        request["full"] = args.full
+    elif args.command == "rebuild":
+        # Resolved here, since the daemon may run from another directory
+        request["paths"] = [os.path.abspath(path) for path in args.paths]
+    try:
+        response = send_request(socket_path, request)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(response["output"], end="")
+    if "error" in response:
+        sys.exit(f"Daemon request failed: {response['error']}")
+    if response["errors"]:
+        sys.exit(f"{len(response['errors'])} page(s) failed to generate")
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    commands = {"merge": merge, "daemon": daemon, "client": client}
+    if argv and argv[0] in commands:
+        return commands[argv[0]](argv[1:])
+    args = parse_args(argv)
+    set_quiet(args.quiet)
+    tracer = Tracer() if args.trace else None
+    set_tracer(tracer)
+    
+    block_cache, page_cache = _open_caches(args)
+    
+    output = args.output
+    if args.shard and not output:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = os.path.join(shard_dir(base_dir, args.shard), "docs")
+    config = BuildConfig(output=output, full=args.full, compare=args.compare, link=args.hardlink,
+                         jobs=args.jobs if args.jobs > 0 else os.cpu_count(),
+                         block_cache=block_cache, page_cache=page_cache, gzip=args.gzip, pipeline=args.pipeline,
+                         io_threads=args.io_threads, deploy_manifest=args.deploy_manifest,
+                         include=args.include, exclude=args.exclude, shard=args.shard)
+    result = build_site(config)
+    
+    for from_path, error in result.errors:
+        print(f"Error generating {from_path}: {error}", file=sys.stderr)
+    
+    if block_cache is not None and block_cache.hits + block_cache.misses:
+        print(f"Block cache: {block_cache.hits} hits, {block_cache.misses} misses")
+    if page_cache is not None:
+        if page_cache.hits + page_cache.misses:
+            print(f"Page cache: {page_cache.hits} hits, {page_cache.misses} misses")
+        page_cache.evict()
     
-    # Copy static files to docs
-    copy_static_to_public(src_dir="static", dest_dir="docs")
+    if tracer is not None:
+        tracer.write_chrome_trace(args.trace)
+        print(tracer.summary(args.top))
+        print(f"Trace written to {args.trace}")
     
-    # Generate all pages recursively from content directory
-    generate_pages_recursive(
-        os.path.join(base_dir, "content"),
-        os.path.join(base_dir, "template.html"),
-        os.path.join(base_dir, "docs")
-    )
+    if args.watch:
+        print(f"Watching for changes (Ctrl+C to stop)...")
+        try:
+            watch([config.content_dir, config.static_dir, config.template_path],
+                  lambda changed, removed: rebuild_changes(changed, removed, config.base_dir, result.manifest,
+                                                           link=args.hardlink, block_cache=block_cache,
+                                                           page_cache=page_cache,
+                                                           precompress=args.gzip),
+                  interval=args.interval)
+        except KeyboardInterrupt:
+            pass
+    elif result.errors:
+        sys.exit(f"{len(result.errors)} page(s) failed to generate")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = ".build-manifest.json"
+
+
+def hash_text(text):
+    """Return the sha256 hex digest of a string encoded as UTF-8."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingWriter:
+    """Wrap a text stream, hashing everything written through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._digest = hashlib.sha256()
+
+    def write(self, text):
+        self._digest.update(text.encode("utf-8"))
+        return self.stream.write(text)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+
+class BuildManifest:
+    """
+    Persisted record of what every generated page was built from.
+
+    Each entry is keyed by the output path (relative to the docs root) and
+    stores the hash of the markdown source, the template it was rendered
+    with, and the HTML that was written. A page is only rebuilt when one of
+    those no longer matches. compressed records the files that have a
+    precompressed .gz copy, keyed the same way. shard is the (i, N) pair a
+    sharded build covered, or None for a whole site.
+    """
+
+    def __init__(self, path=None, pages=None, compressed=None, shard=None):
+        self.path = path
+        self.pages = pages if pages else {}
+        self.compressed = compressed if compressed else {}
+        self.shard = shard
+        self._template_hashes = {}
+        self._seen = set()
+
+    @classmethod
+    def load(cls, path):
+        """Load a manifest from disk, starting empty if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return cls(path)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        shard = tuple(data["shard"]) if data.get("shard") else None
+        return cls(path, data.get("pages", {}), data.get("compressed", {}), shard)
+
+    def save(self, path=None):
+        """Write the manifest back to disk."""
+        path = path or self.path
+        if path is None:
+            raise ValueError("BuildManifest has no path to save to")
+        data = {"version": MANIFEST_VERSION, "pages": self.pages, "compressed": self.compressed,
+                "shard": list(self.shard) if self.shard else None}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def template_hash(self, template_path):
+        """Hash a template once per build, however many pages use it."""
+        if template_path not in self._template_hashes:
+            self._template_hashes[template_path] = hash_file(template_path)
+        return self._template_hashes[template_path]
+
+    def forget_template_hashes(self):
+        """Drop cached template hashes so edited templates are hashed again."""
+        self._template_hashes = {}
+
+    def is_fresh(self, key, source_hash, template_hash, dest_path):
+        """
+        Check whether the output at dest_path is still up to date.
+        The output is only re-hashed when its size or mtime has changed.
+        """
+        self._seen.add(key)
+        entry = self.pages.get(key)
+        if entry is None:
+            return False
+        if entry["source_hash"] != source_hash or entry["template_hash"] != template_hash:
+            return False
+        try:
+            stat = os.stat(dest_path)
+        except OSError:
+            return False
+        if stat.st_size == entry["output_size"] and stat.st_mtime_ns == entry["output_mtime_ns"]:
+            return True
+        return hash_file(dest_path) == entry["output_hash"]
+
+    def record(self, key, source_path, source_hash, template_path, template_hash, dest_path, output_hash):
+        """Record the inputs and output of a page that was just written."""
+        self._seen.add(key)
+        stat = os.stat(dest_path)
+        self.pages[key] = {
+            "source": source_path,
+            "source_hash": source_hash,
+            "template": template_path,
+            "template_hash": template_hash,
+            "output_hash": output_hash,
+            "output_size": stat.st_size,
+            "output_mtime_ns": stat.st_mtime_ns,
+        }
+
+    def subset(self, key):
+        """
+        Return a manifest holding only the entry for key, along with the
+        template hashes computed so far. Used to hand one page to a worker.
+        """
+        pages = {key: self.pages[key]} if key in self.pages else {}
+        page_manifest = BuildManifest(pages=pages)
+        page_manifest._template_hashes = dict(self._template_hashes)
+        return page_manifest
+
+    def merge(self, other):
+        """Fold the entries recorded by a worker's manifest back into this one."""
+        self.pages.update(other.pages)
+        self._seen.update(other._seen)
+
+    def keep(self, key):
+        """Mark an entry as seen so prune() leaves it alone."""
+        self._seen.add(key)
+
+    def remove(self, key):
+        """Drop the entry for key, returning it (or None if there was none)."""
+        self._seen.discard(key)
+        return self.pages.pop(key, None)
+
+    def prune(self):
+        """Drop entries for pages that were not seen this build and return them."""
+        stale = {key: entry for key, entry in self.pages.items() if key not in self._seen}
+        for key in stale:
+            del self.pages[key]
+        return stale
@@ -1,7 +1,9 @@
 from textnode import TextNode, TextType
 from htmlnode import HTMLNode, ParentNode, LeafNode
+from tracing import get_tracer
 from enum import Enum
 import re
+import itertools
 
 
 class BlockType(Enum):
@@ -36,23 +38,20 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     
     return new_nodes
 
+IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+LINK_PATTERN = re.compile(r'(?<!!)\[([^\]]+)\]\(([^)]+)\)')
+
 def extract_markdown_images(text):
-    pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-    matches = re.findall(pattern, text)
-    image_nodes = []
-    for alt_text, url in matches:
-        image_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-    return image_nodes
+    return [TextNode(alt_text, TextType.IMAGE, url) for alt_text, url in IMAGE_PATTERN.findall(text)]
 
 def extract_markdown_links(text):
-    pattern = r'(?<!!)\[([^\]]+)\]\(([^)]+)\)'
-    matches = re.findall(pattern, text)
-    link_nodes = []
-    for link_text, url in matches:
-        link_nodes.append(TextNode(link_text, TextType.LINK, url))
-    return link_nodes
+    return [TextNode(link_text, TextType.LINK, url) for link_text, url in LINK_PATTERN.findall(text)]
 
-def split_nodes_image(old_nodes):
+def _split_nodes_pattern(old_nodes, pattern, text_type):
+    """
+    Split TEXT nodes around every match of pattern, slicing the text by
+    match offsets so each node is scanned exactly once.
+    """
     new_nodes = []
     for node in old_nodes:
         if node.text_type != TextType.TEXT:
@@ -60,60 +59,79 @@ def split_nodes_image(old_nodes):
             continue
         
         text = node.text
-        images = extract_markdown_images(text)
+        position = 0
+        for match in pattern.finditer(text):
+            if match.start() > position:
+                new_nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
         
-        if not images:
+        if position == 0:
+            # No matches, keep the original node
             new_nodes.append(node)
-            continue
-        
-        for image in images:
-            sections = text.split(f"![{image.text}]({image.url})", 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(image)
-            text = sections[1] if len(sections) > 1 else ""
-        
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     
     return new_nodes
 
+def split_nodes_image(old_nodes):
+    return _split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
+
 def split_nodes_link(old_nodes):
-    new_nodes = []
-    for node in old_nodes:
-        if node.text_type != TextType.TEXT:
-            new_nodes.append(node)
-            continue
-        
-        text = node.text
-        links = extract_markdown_links(text)
+    return _split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+# Every inline construct, tried left to right at each position. Images come
+# before links and "**" before "*" so the longer syntax wins, and link text
+# and URLs may not swallow a whole image.
+INLINE_TOKEN_PATTERN = re.compile(
+    r'!\[(?P<image_alt>[^\]]*)\]\((?P<image_url>[^)]+)\)'
+    r'|(?<!!)\[(?P<link_text>(?:(?!!\[[^\]]*\]\([^)]+\))[^\]])+)\]\((?P<link_url>(?:(?!!\[[^\]]*\]\([^)]+\))[^)])+)\)'
+    r'|(?P<delimiter>\*\*|\*|_|`)'
+)
+
+INLINE_DELIMITERS = {
+    "**": TextType.BOLD,
+    "*": TextType.ITALIC,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+def text_to_textnodes(text):
+    """
+    Split text into TextNodes for images, links, bold, italic and code in a
+    single left-to-right scan. Whichever construct starts first wins, so
+    delimiters inside a code span or link are left alone.
+    """
+    nodes = []
+    text_start = 0
+    position = 0
+    while True:
+        match = INLINE_TOKEN_PATTERN.search(text, position)
+        if match is None:
+            break
         
-        if not links:
-            new_nodes.append(node)
+        delimiter = match.group("delimiter")
+        if delimiter is not None:
+            closing = text.find(delimiter, match.end())
+            if closing == -1:
+                raise ValueError(f"Invalid markdown: unclosed delimiter '{delimiter}'")
+            if match.start() > text_start:
+                nodes.append(TextNode(text[text_start:match.start()], TextType.TEXT))
+            if closing > match.end():
+                nodes.append(TextNode(text[match.end():closing], INLINE_DELIMITERS[delimiter]))
+            position = text_start = closing + len(delimiter)
             continue
         
-        for link in links:
-            sections = text.split(f"[{link.text}]({link.url})", 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(link)
-            text = sections[1] if len(sections) > 1 else ""
-        
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+        if match.start() > text_start:
+            nodes.append(TextNode(text[text_start:match.start()], TextType.TEXT))
+        if match.group("image_url") is not None:
+            nodes.append(TextNode(match.group("image_alt"), TextType.IMAGE, match.group("image_url")))
+        else:
+            nodes.append(TextNode(match.group("link_text"), TextType.LINK, match.group("link_url")))
+        position = text_start = match.end()
     
-    return new_nodes
-
-def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    # Extract images and links first to avoid processing their URLs
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    # Then process inline formatting
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    if text_start < len(text):
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
     return nodes
 
 def markdown_to_blocks(markdown):
@@ -124,6 +142,28 @@ def markdown_to_blocks(markdown):
             filtered_blocks.append(block.strip())
     return filtered_blocks
 
+def iter_markdown_blocks(lines):
+    """
+    Yield the same blocks as markdown_to_blocks from an iterable of lines,
+    such as an open file, holding only the current block in memory.
+    """
+    block_lines = []
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line:
+            block_lines.append(line)
+            continue
+        # An empty line ends the current block
+        block = "\n".join(block_lines).strip()
+        if block:
+            yield block
+        block_lines = []
+    
+    block = "\n".join(block_lines).strip()
+    if block:
+        yield block
+
 def block_to_block_type(block):
     lines = block.split("\n")
     
@@ -150,17 +190,21 @@ def block_to_block_type(block):
     # Default to paragraph
     return BlockType.PARAGRAPH
 
-def text_to_children(text):
+def text_to_children(text, rewrite_url=None):
     """Convert text with inline markdown to a list of HTMLNode children"""
-    text_nodes = text_to_textnodes(text)
+    with get_tracer().span("inline"):
+        text_nodes = text_to_textnodes(text)
     children = []
     for node in text_nodes:
-        html_node = text_node_to_html_node(node)
+        html_node = text_node_to_html_node(node, rewrite_url)
         children.append(html_node)
     return children
 
-def text_node_to_html_node(text_node):
-    """Convert a TextNode to an HTMLNode (LeafNode)"""
+def text_node_to_html_node(text_node, rewrite_url=None):
+    """
+    Convert a TextNode to an HTMLNode (LeafNode). rewrite_url, if given,
+    is applied to link and image URLs.
+    """
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(None, text_node.text)
@@ -171,77 +215,122 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            url = rewrite_url(text_node.url) if rewrite_url else text_node.url
+            return LeafNode("a", text_node.text, {"href": url})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            url = rewrite_url(text_node.url) if rewrite_url else text_node.url
+            return LeafNode("img", "", {"src": url, "alt": text_node.text})
         case _:
             raise ValueError(f"Unknown text type: {text_node.text_type}")
 
-def markdown_to_html_node(markdown):
-    """Convert a full markdown document to a single parent HTMLNode"""
-    blocks = markdown_to_blocks(markdown)
-    children = []
+def block_to_html_node(block, rewrite_url=None):
+    """Convert a single markdown block to an HTMLNode"""
+    block_type = block_to_block_type(block)
     
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        
-        if block_type == BlockType.HEADING:
-            # Count the number of # characters
-            level = 0
-            for char in block:
-                if char == "#":
-                    level += 1
-                else:
-                    break
-            # Remove the # characters and space
-            text = block[level:].strip()
-            children_nodes = text_to_children(text)
-            children.append(ParentNode(f"h{level}", children_nodes))
-        
-        elif block_type == BlockType.CODE:
-            # Remove the ``` markers
-            code_text = block.strip("`").strip()
-            children.append(ParentNode("pre", [LeafNode("code", code_text)]))
-        
-        elif block_type == BlockType.QUOTE:
-            # Remove > from each line
-            lines = block.split("\n")
-            quote_text = "\n".join(line[1:].strip() for line in lines)
-            children_nodes = text_to_children(quote_text)
-            children.append(ParentNode("blockquote", children_nodes))
-        
-        elif block_type == BlockType.UNORDERED_LIST:
-            # Create list items
-            lines = block.split("\n")
-            list_items = []
-            for line in lines:
-                # Remove the marker (- or *)
-                text = line[2:]
-                item_children = text_to_children(text)
-                list_items.append(ParentNode("li", item_children))
-            children.append(ParentNode("ul", list_items))
-        
-        elif block_type == BlockType.ORDERED_LIST:
-            # Create list items
-            lines = block.split("\n")
-            list_items = []
-            for line in lines:
-                # Remove the number and ". "
-                text = line.split(". ", 1)[1]
-                item_children = text_to_children(text)
-                list_items.append(ParentNode("li", item_children))
-            children.append(ParentNode("ol", list_items))
-        
-        else:  # PARAGRAPH
-            children_nodes = text_to_children(block)
-            children.append(ParentNode("p", children_nodes))
+    if block_type == BlockType.HEADING:
+        # Count the number of # characters
+        level = 0
+        for char in block:
+            if char == "#":
+                level += 1
+            else:
+                break
+        # Remove the # characters and space
+        text = block[level:].strip()
+        children_nodes = text_to_children(text, rewrite_url)
+        return ParentNode(f"h{level}", children_nodes)
     
+    elif block_type == BlockType.CODE:
+        # Remove the ``` markers
+        code_text = block.strip("`").strip()
+        return ParentNode("pre", [LeafNode("code", code_text)])
+    
+    elif block_type == BlockType.QUOTE:
+        # Remove > from each line
+        lines = block.split("\n")
+        quote_text = "\n".join(line[1:].strip() for line in lines)
+        children_nodes = text_to_children(quote_text, rewrite_url)
+        return ParentNode("blockquote", children_nodes)
+    
+    elif block_type == BlockType.UNORDERED_LIST:
+        # Create list items
+        lines = block.split("\n")
+        list_items = []
+        for line in lines:
+            # Remove the marker (- or *)
+            text = line[2:]
+            item_children = text_to_children(text, rewrite_url)
+            list_items.append(ParentNode("li", item_children))
+        return ParentNode("ul", list_items)
+    
+    elif block_type == BlockType.ORDERED_LIST:
+        # Create list items
+        lines = block.split("\n")
+        list_items = []
+        for line in lines:
+            # Remove the number and ". "
+            text = line.split(". ", 1)[1]
+            item_children = text_to_children(text, rewrite_url)
+            list_items.append(ParentNode("li", item_children))
+        return ParentNode("ol", list_items)
+    
+    else:  # PARAGRAPH
+        children_nodes = text_to_children(block, rewrite_url)
+        return ParentNode("p", children_nodes)
+
+def markdown_to_html_node(markdown, rewrite_url=None):
+    """
+    Convert a full markdown document to a single parent HTMLNode.
+    rewrite_url, if given, is applied to every link and image URL.
+    """
+    children = [block_to_html_node(block, rewrite_url) for block in markdown_to_blocks(markdown)]
     return ParentNode("div", children)
 
+def iter_markdown_html(lines, block_cache=None, rewrite_url=None, cache_variant=""):
+    """
+    Stream the HTML of a markdown document read from an iterable of lines.
+    Yields the same chunks as markdown_to_html_node(...).iter_html(), but
+    only one block is parsed and held in memory at a time. With a
+    block_cache, each block's HTML is looked up before parsing it and is
+    yielded as a single chunk; cache_variant must identify rewrite_url,
+    since the cached HTML depends on it.
+    """
+    tracer = get_tracer()
+    blocks = iter_markdown_blocks(lines)
+    first_block = next(blocks, None)
+    if first_block is None:
+        raise ValueError("Markdown document has no blocks")
+    
+    yield "<div>"
+    for block in itertools.chain([first_block], blocks):
+        if block_cache is not None:
+            html = block_cache.get(block, cache_variant)
+            if html is None:
+                with tracer.span("parse"):
+                    html = block_to_html_node(block, rewrite_url).to_html()
+                block_cache.put(block, html, cache_variant)
+            yield html
+            continue
+        
+        with tracer.span("parse"):
+            node = block_to_html_node(block, rewrite_url)
+        yield from node.iter_html()
+    yield "</div>"
+
 def extract_title(markdown):
     """Extract the h1 title from a markdown document"""
-    lines = markdown.strip().split("\n")
+    return extract_title_from_lines(markdown.split("\n"))
+
+def extract_title_from_lines(lines):
+    """Extract the h1 title from an iterable of lines, stopping at the title"""
+    leading = True
     for line in lines:
+        # Leading whitespace of the document is ignored
+        if leading:
+            if not line.strip():
+                continue
+            line = line.lstrip()
+            leading = False
         if line.startswith("# "):
             return line[2:].strip()
     raise ValueError("No h1 header found in markdown")
@@ -0,0 +1,127 @@
+import os
+import hashlib
+import tempfile
+from blockcache import PARSER_MODULES
+
+# Modules whose source decides a finished page's HTML
+GENERATOR_MODULES = PARSER_MODULES + ("render.py", "template.py")
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+_generator_version = None
+
+
+def generator_version():
+    """Hash of the generator's source, so upgrading the generator invalidates cached pages."""
+    global _generator_version
+    if _generator_version is None:
+        digest = hashlib.sha256()
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in GENERATOR_MODULES:
+            with open(os.path.join(src_dir, name), 'rb') as f:
+                digest.update(f.read())
+        _generator_version = digest.hexdigest()
+    return _generator_version
+
+
+class PageCache:
+    """
+    Content-addressed cache of finished page HTML in a directory, which can
+    be shared between checkouts, machines and concurrent builds.
+
+    A page's key covers its markdown, its template, its depth in the site
+    (URLs are rewritten relative to it) and the generator version, so any
+    build that would produce the same HTML can reuse it. Entries are written
+    to a temporary file and renamed into place, so concurrent writers never
+    expose a partial page. Hits touch the entry's mtime, and evict() removes
+    the least recently used entries once the directory is over max_bytes.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_hash, template_hash, path_prefix):
+        parts = (generator_version(), template_hash, source_hash, path_prefix)
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".html")
+
+    def get(self, key):
+        """Return the cached HTML for key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                html = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # A read-only shared cache still serves hits
+            pass
+        self.hits += 1
+        return html
+
+    def put(self, key, html):
+        """Store a page's HTML under key."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(html)
+            # mkstemp creates files only we can read; the cache may be shared
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put_file(self, key, source_path):
+        """Store the HTML in a file already written, such as a page's output."""
+        with open(source_path, 'r') as f:
+            self.put(key, f.read())
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        """(path, size, mtime_ns) for every entry, skipping other writers' temporary files."""
+        if not os.path.isdir(self.root):
+            return
+        with os.scandir(self.root) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith(".html"):
+                            continue
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        yield entry.path, stat.st_size, stat.st_mtime_ns
+
+    def evict(self):
+        """Remove least recently used entries until the cache is under max_bytes. Returns the number removed."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        excess = sum(size for _, size, _ in entries) - self.max_bytes
+        removed = 0
+        for path, size, _ in entries:
+            if excess <= 0:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another build evicted it first
+                pass
+            excess -= size
+            removed += 1
+        return removed
@@ -0,0 +1,187 @@
+import io
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from markdown import extract_title_from_lines
+from manifest import hash_text, hash_file
+from sync import replace_if_changed
+from template import load_template
+from render import path_prefix_for, render_page
+from tracing import get_tracer, log
+
+# Pages waiting between two stages, per stage; bounds memory on large sites
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_IO_THREADS = 4
+
+# Block caches opened by this worker process, by path
+_worker_block_caches = {}
+
+
+def _read_page(from_path, dest_path, manifest_key, manifest, template_hash, page_cache, path_prefix):
+    """
+    Reader stage: read a markdown file, find its title and look the page up
+    in the page cache. Returns None if the manifest says the page is already
+    up to date, else (markdown, source hash, title, cached HTML or None).
+    """
+    with open(from_path, 'r') as f:
+        markdown = f.read()
+    source_hash = hash_text(markdown)
+    if manifest is not None and manifest.is_fresh(manifest_key, source_hash, template_hash, dest_path):
+        return None
+    html = None
+    if page_cache is not None:
+        html = page_cache.get(page_cache.key(source_hash, template_hash, path_prefix))
+    return markdown, source_hash, extract_title_from_lines(io.StringIO(markdown)), html
+
+def _render(markdown, template_path, title, path_prefix, block_cache):
+    """Render stage: turn markdown into the page's full HTML."""
+    buffer = io.StringIO()
+    render_page(io.StringIO(markdown), load_template(template_path), title, path_prefix, buffer, block_cache)
+    if block_cache is not None:
+        block_cache.flush()
+    return buffer.getvalue()
+
+def _render_in_worker(markdown, template_path, title, path_prefix, block_cache):
+    """_render for a worker process, reusing one block cache connection per process."""
+    if block_cache is not None:
+        block_cache = _worker_block_caches.setdefault(block_cache.path, block_cache)
+    return _render(markdown, template_path, title, path_prefix, block_cache)
+
+def _write_page(dest_path, html, html_hash):
+    """
+    Writer stage: write a page through a temporary file, leaving the old
+    file alone if it is identical. Returns True if the page was written.
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(html)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return replace_if_changed(tmp_path, dest_path, html_hash)
+
+
+async def _run_pipeline(pages, template_path, docs_root, manifest, block_cache, page_cache, jobs, io_threads,
+                        queue_size, stats):
+    loop = asyncio.get_running_loop()
+    tracer = get_tracer()
+    if manifest is not None:
+        template_hash = manifest.template_hash(template_path)
+    else:
+        template_hash = hash_file(template_path) if page_cache is not None else None
+    errors = {}
+    render_queue = asyncio.Queue(maxsize=queue_size)
+    write_queue = asyncio.Queue(maxsize=queue_size)
+    # Shared by the readers, so pages are pulled from the walker as needed
+    pending = enumerate(pages)
+
+    # Parsing holds the GIL, so in-process rendering gets one thread of its
+    # own; the block cache's connection then stays on that thread too
+    if jobs > 1:
+        render_pool = ProcessPoolExecutor(max_workers=jobs)
+        render_func = _render_in_worker
+        renderers = jobs
+    else:
+        render_pool = ThreadPoolExecutor(max_workers=1)
+        render_func = _render
+        renderers = 1
+    io_pool = ThreadPoolExecutor(max_workers=io_threads)
+
+    def fail(index, from_path, key, error):
+        errors[index] = (from_path, error)
+        # Keep the previous entry so its output is not pruned
+        if manifest is not None:
+            manifest.keep(key)
+
+    async def reader():
+        for index, (from_path, dest_path) in pending:
+            key = os.path.relpath(dest_path, docs_root)
+            path_prefix = path_prefix_for(docs_root, os.path.dirname(dest_path))
+            try:
+                with tracer.span("read", path=from_path):
+                    page = await loop.run_in_executor(io_pool, _read_page, from_path, dest_path, key,
+                                                      manifest, template_hash, page_cache, path_prefix)
+            except Exception as e:
+                fail(index, from_path, key, e)
+                continue
+            if page is None:
+                log(f"Skipping unchanged page {from_path}")
+                if stats is not None:
+                    stats.unchanged += 1
+                continue
+            await render_queue.put((index, from_path, dest_path, key, path_prefix, page))
+
+    async def renderer():
+        while (item := await render_queue.get()) is not None:
+            index, from_path, dest_path, key, path_prefix, (markdown, source_hash, title, html) = item
+            # Only set for freshly rendered pages, which the writer adds to the page cache
+            cache_key = None
+            log(f"Generating page from {from_path} to {dest_path} using {template_path}")
+            if html is None:
+                try:
+                    with tracer.span("render", path=from_path):
+                        html = await loop.run_in_executor(render_pool, render_func, markdown, template_path,
+                                                          title, path_prefix, block_cache)
+                except Exception as e:
+                    fail(index, from_path, key, e)
+                    continue
+                if page_cache is not None:
+                    cache_key = page_cache.key(source_hash, template_hash, path_prefix)
+            await write_queue.put((index, from_path, dest_path, key, source_hash, html, cache_key))
+
+    async def writer():
+        while (item := await write_queue.get()) is not None:
+            index, from_path, dest_path, key, source_hash, html, cache_key = item
+            html_hash = hash_text(html)
+            try:
+                with tracer.span("write", path=dest_path):
+                    written = await loop.run_in_executor(io_pool, _write_page, dest_path, html, html_hash)
+                if cache_key is not None:
+                    await loop.run_in_executor(io_pool, page_cache.put, cache_key, html)
+            except Exception as e:
+                fail(index, from_path, key, e)
+                continue
+            if stats is not None:
+                stats.count(written)
+            if manifest is not None:
+                manifest.record(key, from_path, source_hash, template_path, template_hash, dest_path, html_hash)
+
+    async def stage(workers, queue, consumers):
+        # Run a stage's workers, then tell every consumer of its output to stop
+        await asyncio.gather(*workers)
+        for _ in range(consumers):
+            await queue.put(None)
+
+    try:
+        writers = [writer() for _ in range(io_threads)]
+        await asyncio.gather(
+            stage([reader() for _ in range(io_threads)], render_queue, renderers),
+            stage([renderer() for _ in range(renderers)], write_queue, len(writers)),
+            *writers,
+        )
+        if block_cache is not None and jobs == 1:
+            # Close on the render thread, which owns the connection
+            await loop.run_in_executor(render_pool, block_cache.close)
+    finally:
+        render_pool.shutdown()
+        io_pool.shutdown()
+    return [errors[index] for index in sorted(errors)]
+
+def generate_pages_pipelined(pages, template_path, docs_root, manifest=None, block_cache=None, page_cache=None,
+                             jobs=1, io_threads=DEFAULT_IO_THREADS, queue_size=DEFAULT_QUEUE_SIZE, stats=None):
+    """
+    Build pages in three overlapping stages joined by bounded queues:
+    io_threads readers load markdown, renderers parse it (across jobs worker
+    processes when jobs > 1), and io_threads writers save the HTML. Disk
+    waits are hidden behind parsing instead of adding up page by page.
+    pages is an iterable of (markdown path, html path) pairs, such as
+    walk.iter_pages(), and is consumed only as fast as the readers need.
+    Pages found in page_cache skip rendering. Written and unchanged pages
+    are counted in stats, a WriteStats, if given. Returns a list of
+    (markdown path, exception) pairs for failed pages, in page order.
+    """
+    return asyncio.run(_run_pipeline(pages, template_path, docs_root, manifest, block_cache, page_cache, jobs,
+                                     io_threads, queue_size, stats))
@@ -0,0 +1,71 @@
+import os
+import time
+import functools
+from markdown import iter_markdown_html
+from tracing import get_tracer
+
+
+def _fix_paths(html, path_prefix):
+    """
+    Rewrite root-relative links and the template's CSS link to be relative
+    to the page, so the site works both locally and on GitHub Pages.
+    Only applied to template markup; page content is rewritten on its
+    nodes by make_url_rewriter.
+    """
+    html = html.replace('href="/', f'href="{path_prefix}')
+    html = html.replace('src="/', f'src="{path_prefix}')
+    return html.replace('href="./index.css"', f'href="{path_prefix}index.css"')
+
+@functools.lru_cache(maxsize=1024)
+def make_url_rewriter(path_prefix):
+    """
+    Return a function that makes a root-relative URL ("/blog/") relative to
+    the page through path_prefix. Other URLs, including protocol-relative
+    ones ("//example.com"), are returned unchanged.
+    """
+    def rewrite_url(url):
+        if url.startswith("/") and not url.startswith("//"):
+            return path_prefix + url[1:]
+        return url
+    return rewrite_url
+
+@functools.lru_cache(maxsize=1024)
+def path_prefix_for(base_dir, dest_dir):
+    """Relative path from a page's directory back to the docs root, ending in "/"."""
+    rel_path = os.path.relpath(base_dir, dest_dir)
+    if rel_path == '.':
+        return './'
+    return rel_path + '/'
+
+@functools.lru_cache(maxsize=256)
+def template_for_prefix(template, path_prefix):
+    """The template with its own links rewritten for pages under path_prefix."""
+    return template.map_literals(lambda literal: _fix_paths(literal, path_prefix))
+
+def render_page(lines, template, title, path_prefix, stream, block_cache=None):
+    """
+    Write the HTML for a markdown page, given as an iterable of lines such
+    as an open file, to a text stream. The template's links and the page's
+    root-relative URLs are made relative to the page through path_prefix.
+    """
+    tracer = get_tracer()
+    # Template links are rewritten once per directory depth, not per page
+    template = template_for_prefix(template, path_prefix)
+
+    # Stream template parts and page HTML straight into the stream, parsing
+    # one block at a time as the lines are read. Link and image URLs are
+    # rewritten as their nodes are built.
+    content = iter_markdown_html(lines, block_cache, rewrite_url=make_url_rewriter(path_prefix),
+                                 cache_variant=path_prefix)
+    chunks = template.iter_render(Title=title, Content=content)
+    if tracer.enabled:
+        # Writes are interleaved with parsing, so they are timed in total
+        write_time = 0.0
+        for chunk in chunks:
+            start = time.perf_counter()
+            stream.write(chunk)
+            write_time += time.perf_counter() - start
+        tracer.add("write", write_time)
+    else:
+        for chunk in chunks:
+            stream.write(chunk)
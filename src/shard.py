@@ -0,0 +1,99 @@
+import os
+from manifest import BuildManifest, MANIFEST_FILENAME, hash_file
+from sync import SyncStats, files_match, copy_file
+from walk import walk_files
+from tracing import log
+
+
+def shard_dir(base_dir, shard):
+    """Where shard (i, N) is built by default: shards/i-of-N/ under base_dir."""
+    index, count = shard
+    return os.path.join(base_dir, "shards", f"{index}-of-{count}")
+
+def _load_shards(shard_dirs):
+    """
+    Load every shard's partial manifest, checking that together they are
+    exactly shards 1 to N of one build.
+    """
+    manifests = []
+    for directory in shard_dirs:
+        path = os.path.join(directory, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            raise ValueError(f"No build manifest in shard directory {directory}")
+        manifest = BuildManifest.load(path)
+        if manifest.shard is None:
+            raise ValueError(f"{directory} was not built with --shard")
+        manifests.append(manifest)
+
+    counts = {manifest.shard[1] for manifest in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"Shards come from builds split different ways: {sorted(counts)}")
+    count = counts.pop()
+    indices = sorted(manifest.shard[0] for manifest in manifests)
+    if indices != list(range(1, count + 1)):
+        raise ValueError(f"Expected shards 1 to {count} once each, got {indices}")
+    return manifests
+
+def _collect_files(shard_dirs):
+    """
+    Map every output path to the shard file that provides it. A path in
+    more than one shard is only allowed if every copy is identical.
+    """
+    files = {}
+    collisions = []
+    for directory in shard_dirs:
+        for path, rel_path, _ in walk_files(os.path.join(directory, "docs")):
+            other = files.get(rel_path)
+            if other is None:
+                files[rel_path] = path
+            elif hash_file(other) != hash_file(path):
+                collisions.append(rel_path)
+    if collisions:
+        raise ValueError(f"Shards disagree on {len(collisions)} file(s): {', '.join(sorted(collisions))}")
+    return files
+
+def merge_shards(shard_dirs, dest_root, manifest_path):
+    """
+    Combine the outputs of shards 1 to N (each a directory holding docs/ and
+    a partial build manifest) into dest_root, and their manifests into one
+    at manifest_path. Everything is checked before dest_root is touched.
+    Files are copied only if they differ from what dest_root already holds,
+    and files no shard produced are removed. Returns a SyncStats.
+    """
+    manifests = _load_shards(shard_dirs)
+    files = _collect_files(shard_dirs)
+
+    merged = BuildManifest(manifest_path)
+    for manifest in manifests:
+        merged.pages.update(manifest.pages)
+        merged.compressed.update(manifest.compressed)
+
+    stats = SyncStats()
+    os.makedirs(dest_root, exist_ok=True)
+    for rel_path, src in sorted(files.items()):
+        dest = os.path.join(dest_root, rel_path.replace("/", os.sep))
+        src_stat = os.stat(src)
+        if os.path.isfile(dest) and files_match(src, dest, src_stat, os.stat(dest), "hash"):
+            stats.unchanged += 1
+            continue
+        log(f"Copying file: {src} -> {dest}")
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        copy_file(src, dest, src_stat.st_size)
+        stats.copied += 1
+
+    for path, rel_path, _ in list(walk_files(dest_root)):
+        if rel_path not in files:
+            log(f"Removing orphaned file: {path}")
+            os.remove(path)
+            stats.removed += 1
+
+    # Entries describe the shard's copies; point them at the merged files so
+    # the next build's stat shortcut works
+    for key, entry in merged.pages.items():
+        stat = os.stat(os.path.join(dest_root, key))
+        entry["output_size"], entry["output_mtime_ns"] = stat.st_size, stat.st_mtime_ns
+    for key, entry in merged.compressed.items():
+        stat = os.stat(os.path.join(dest_root, key))
+        entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+    merged.save()
+    return stats
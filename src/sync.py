@@ -0,0 +1,193 @@
+import os
+import shutil
+from manifest import hash_file
+from tracing import log
+from walk import matches, in_shard
+
+# Files at least this large are copied with os.copy_file_range where available
+LARGE_FILE_THRESHOLD = 8 * 1024 * 1024
+
+
+class SyncStats:
+    """Counts of what a sync did, for the build summary."""
+
+    def __init__(self):
+        self.copied = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def __repr__(self):
+        return f"SyncStats(copied={self.copied}, unchanged={self.unchanged}, removed={self.removed})"
+
+
+class WriteStats:
+    """Counts of generated files that were rewritten or left alone, for the build summary."""
+
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+
+    def count(self, written):
+        if written:
+            self.written += 1
+        else:
+            self.unchanged += 1
+
+    def __repr__(self):
+        return f"WriteStats(written={self.written}, unchanged={self.unchanged})"
+
+
+def files_match(src, dest, src_stat, dest_stat, compare="mtime"):
+    """
+    Decide whether dest is already an up to date copy of src.
+    "mtime" trusts size and modification time, "hash" compares contents.
+    """
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    # A hardlink to the source is always up to date
+    if src_stat.st_ino == dest_stat.st_ino and src_stat.st_dev == dest_stat.st_dev:
+        return True
+    if compare == "hash":
+        return hash_file(src) == hash_file(dest)
+    if compare == "mtime":
+        return src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+    raise ValueError(f"Unknown compare mode: {compare}")
+
+def _copy_file_range(src, dest, size):
+    """Copy a file in kernel space with os.copy_file_range."""
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+        remaining = size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdest.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(src, dest)
+
+def copy_file(src, dest, size, link=False):
+    """
+    Copy src over dest, going through a temporary file so readers never see
+    a half-written asset. With link=True a hardlink is tried first.
+    """
+    tmp_dest = dest + ".sync-tmp"
+    if os.path.lexists(tmp_dest):
+        os.remove(tmp_dest)
+
+    if link:
+        try:
+            os.link(src, tmp_dest)
+            os.replace(tmp_dest, dest)
+            return
+        except OSError:
+            # Different filesystem or no hardlink support, fall back to copying
+            pass
+
+    if size >= LARGE_FILE_THRESHOLD and hasattr(os, "copy_file_range"):
+        try:
+            _copy_file_range(src, tmp_dest, size)
+            os.replace(tmp_dest, dest)
+            return
+        except OSError:
+            pass
+
+    shutil.copy2(src, tmp_dest)
+    os.replace(tmp_dest, dest)
+
+def replace_if_changed(tmp_path, dest_path, tmp_hash=None):
+    """
+    Move a freshly written tmp_path over dest_path, unless dest_path already
+    holds the same bytes (compared by size, then hash), in which case
+    tmp_path is removed and dest_path keeps its mtime. tmp_hash saves
+    hashing the new file when the caller already knows it. Returns True if
+    dest_path was replaced.
+    """
+    try:
+        dest_size = os.path.getsize(dest_path)
+    except OSError:
+        dest_size = None
+    if dest_size == os.path.getsize(tmp_path):
+        if tmp_hash is None:
+            tmp_hash = hash_file(tmp_path)
+        if hash_file(dest_path) == tmp_hash:
+            os.remove(tmp_path)
+            return False
+    os.replace(tmp_path, dest_path)
+    return True
+
+def sync_directory(src, dest, keep=None, compare="mtime", link=False, stats=None, root=None, include=None,
+                   exclude=None, shard=None):
+    """
+    Make dest mirror src, copying only files that changed and removing
+    files that no longer exist in src. keep is an optional predicate on a
+    path relative to the dest root; matching files are never removed, which
+    is how generated pages survive the sync. Source files not selected by
+    the include and exclude globs, or not in shard, are treated as missing.
+    """
+    if not os.path.exists(src):
+        raise ValueError(f"Source directory {src} does not exist")
+    if stats is None:
+        stats = SyncStats()
+    if root is None:
+        root = dest
+
+    os.makedirs(dest, exist_ok=True)
+    rel_dir = os.path.relpath(dest, root).replace(os.sep, "/")
+    rel_dir = "" if rel_dir == "." else rel_dir + "/"
+    # Scan once, reusing each entry's type and stat instead of stat-ing again
+    with os.scandir(src) as entries:
+        src_entries = {}
+        for entry in entries:
+            if entry.is_dir():
+                if not exclude or matches(rel_dir + entry.name, exclude=exclude):
+                    src_entries[entry.name] = entry
+            elif matches(rel_dir + entry.name, include, exclude) and in_shard(rel_dir + entry.name, shard):
+                src_entries[entry.name] = entry
+    src_items = set(src_entries)
+
+    for item in sorted(src_items):
+        entry = src_entries[item]
+        src_item = entry.path
+        dest_item = os.path.join(dest, item)
+
+        if entry.is_file():
+            src_stat = entry.stat()
+            if os.path.isdir(dest_item):
+                shutil.rmtree(dest_item)
+            if os.path.isfile(dest_item) and files_match(src_item, dest_item, src_stat, os.stat(dest_item), compare):
+                stats.unchanged += 1
+                continue
+            log(f"Copying file: {src_item} -> {dest_item}")
+            copy_file(src_item, dest_item, src_stat.st_size, link=link)
+            stats.copied += 1
+        elif entry.is_dir():
+            if os.path.isfile(dest_item):
+                os.remove(dest_item)
+            sync_directory(src_item, dest_item, keep, compare, link, stats, root, include, exclude, shard)
+
+    # Remove anything in dest that is no longer in src
+    for item in sorted(os.listdir(dest)):
+        if item in src_items:
+            continue
+        dest_item = os.path.join(dest, item)
+        rel_path = os.path.relpath(dest_item, root)
+        if os.path.isdir(dest_item):
+            _remove_orphans(dest_item, root, keep, stats)
+        elif keep is None or not keep(rel_path):
+            log(f"Removing orphaned file: {dest_item}")
+            os.remove(dest_item)
+            stats.removed += 1
+
+    return stats
+
+def _remove_orphans(path, root, keep, stats):
+    """Remove files under a directory that only exists in dest, sparing kept files."""
+    for item in os.listdir(path):
+        item_path = os.path.join(path, item)
+        if os.path.isdir(item_path):
+            _remove_orphans(item_path, root, keep, stats)
+        elif keep is None or not keep(os.path.relpath(item_path, root)):
+            log(f"Removing orphaned file: {item_path}")
+            os.remove(item_path)
+            stats.removed += 1
+    if not os.listdir(path):
+        os.rmdir(path)
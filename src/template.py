@@ -0,0 +1,105 @@
+import os
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+
+# Compiled templates by path, along with the stat they were compiled from
+_template_cache = {}
+
+
+class Template:
+    """
+    A page template pre-split into literal segments and named slots.
+
+    "<title>{{ Title }}</title>" compiles to the parts
+    ["<title>", None, "</title>"] with the slot "Title" at index 1, so
+    rendering a page only fills the slots and joins the parts once.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.parts = []
+        self.slots = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.parts.append(source[position:match.start()])
+            self.slots.append((len(self.parts), match.group(1), match.group(0)))
+            self.parts.append(None)
+            position = match.end()
+        self.parts.append(source[position:])
+
+    @property
+    def placeholders(self):
+        """Names of the placeholders used in the template, in order."""
+        return [name for _, name, _ in self.slots]
+
+    def render(self, **values):
+        """
+        Fill the template's placeholders and return the page.
+        Placeholders without a value are left in the output untouched.
+        """
+        parts = list(self.parts)
+        for index, name, placeholder in self.slots:
+            parts[index] = values.get(name, placeholder)
+        return "".join(parts)
+
+    def iter_render(self, **values):
+        """
+        Yield the page in chunks. A value may be a string or an iterable of
+        string chunks, such as HTMLNode.iter_html(), which is streamed
+        through without being joined.
+        """
+        slots = {index: (name, placeholder) for index, name, placeholder in self.slots}
+        for index, part in enumerate(self.parts):
+            if part is not None:
+                if part:
+                    yield part
+                continue
+            name, placeholder = slots[index]
+            value = values.get(name, placeholder)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+
+    def map_literals(self, func):
+        """
+        Return a copy of the template with func applied to every literal
+        segment, leaving the slots alone. Used to rewrite the template's own
+        markup once rather than every page rendered from it.
+        """
+        template = Template.__new__(Template)
+        template.parts = [None if part is None else func(part) for part in self.parts]
+        template.slots = list(self.slots)
+        placeholders = {index: placeholder for index, _, placeholder in self.slots}
+        template.source = "".join(placeholders[index] if part is None else part
+                                  for index, part in enumerate(template.parts))
+        return template
+
+    def __eq__(self, other):
+        if not isinstance(other, Template):
+            return False
+        return self.source == other.source
+
+    def __hash__(self):
+        return hash(self.source)
+
+    def __repr__(self):
+        return f"Template(placeholders={self.placeholders})"
+
+
+def load_template(template_path):
+    """
+    Read and compile a template, reusing the compiled copy for as long as
+    the file on disk is unchanged.
+    """
+    stat = os.stat(template_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _template_cache.get(template_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with open(template_path, 'r') as f:
+        template = Template(f.read())
+    _template_cache[template_path] = (key, template)
+    return template
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+from bench import generate_corpus, compare_results, SHAPES
+
+
+class TestGenerateCorpus(unittest.TestCase):
+    def test_every_shape_generates_pages(self):
+        for shape in SHAPES:
+            with tempfile.TemporaryDirectory() as root:
+                generate_corpus(root, shape, pages=5, paragraphs=3, image_size=16)
+                pages = [name for _, _, names in os.walk(os.path.join(root, "content"))
+                         for name in names if name.endswith(".md")]
+                self.assertEqual(len(pages), 5, shape)
+                self.assertTrue(os.path.exists(os.path.join(root, "template.html")))
+
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            generate_corpus(first, "links", pages=2, paragraphs=2)
+            generate_corpus(second, "links", pages=2, paragraphs=2)
+            path = os.path.join("content", "page-1", "index.md")
+            with open(os.path.join(first, path)) as a, open(os.path.join(second, path)) as b:
+                self.assertEqual(a.read(), b.read())
+
+    def test_unknown_shape_raises(self):
+        with tempfile.TemporaryDirectory() as root:
+            with self.assertRaises(ValueError):
+                generate_corpus(root, "spirals")
+
+
+class TestCompareResults(unittest.TestCase):
+    def test_regressions_over_threshold(self):
+        baseline = {"shapes": {"links": {"to_html": 1.0, "file_write": 1.0}}}
+        results = {"shapes": {"links": {"to_html": 1.05, "file_write": 1.5, "new_stage": 9.0}}}
+        self.assertEqual(compare_results(results, baseline, threshold=0.10),
+                         [("links", "file_write", 1.0, 1.5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import io
+import os
+import pickle
+import tempfile
+import unittest
+from blockcache import BlockCache
+from markdown import iter_markdown_html, markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_put_flush(self):
+        cache = BlockCache(self.path)
+        self.assertIsNone(cache.get("# Title"))
+        cache.put("# Title", "<h1>Title</h1>")
+        # Pending entries are visible before they are flushed
+        self.assertEqual(cache.get("# Title"), "<h1>Title</h1>")
+        cache.close()
+
+        reopened = BlockCache(self.path)
+        self.assertEqual(reopened.get("# Title"), "<h1>Title</h1>")
+        self.assertEqual((reopened.hits, reopened.misses), (1, 0))
+        reopened.close()
+
+    def test_variants_are_cached_separately(self):
+        cache = BlockCache(self.path)
+        cache.put("[a](/x)", '<p><a href="./x">a</a></p>', "./")
+        self.assertIsNone(cache.get("[a](/x)", "../"))
+        self.assertEqual(cache.get("[a](/x)", "./"), '<p><a href="./x">a</a></p>')
+        cache.close()
+
+    def test_lru_eviction(self):
+        cache = BlockCache(self.path, max_bytes=350)
+        for i in range(3):
+            cache.put(f"block {i}", "x" * 100)
+            cache.flush()
+        cache.get("block 0")
+        cache.flush()
+        cache.put("block 3", "x" * 100)
+        cache.flush()
+        self.assertLessEqual(cache.total_bytes(), 350)
+        self.assertIsNotNone(cache.get("block 0"))
+        self.assertIsNone(cache.get("block 1"))
+        cache.close()
+
+    def test_pickles_without_connection(self):
+        cache = BlockCache(self.path, max_bytes=1000)
+        cache.get("anything")
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((copy.path, copy.max_bytes, copy.hits), (self.path, 1000, 0))
+        cache.close()
+
+    def test_cached_render_matches_uncached(self):
+        markdown = "# Title\n\nSome **bold** text\n\n- one\n- two"
+        expected = markdown_to_html_node(markdown).to_html()
+        cache = BlockCache(self.path)
+        first = "".join(iter_markdown_html(io.StringIO(markdown), cache))
+        cache.flush()
+        second = "".join(iter_markdown_html(io.StringIO(markdown), cache))
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import gzip
+import tempfile
+import unittest
+from compress import gzip_file, precompress_directory, is_compressible
+from manifest import BuildManifest
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "blog"))
+        self.page = os.path.join(self.root, "blog", "index.html")
+        self.css = os.path.join(self.root, "index.css")
+        self.image = os.path.join(self.root, "logo.png")
+        for path, content in ((self.page, "<p>post</p>" * 50), (self.css, "body {}"), (self.image, "png")):
+            with open(path, 'w') as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible("index.html"))
+        self.assertTrue(is_compressible("site.css"))
+        self.assertFalse(is_compressible("logo.png"))
+        self.assertFalse(is_compressible("index.html.gz"))
+
+    def test_gzip_file_round_trips_and_is_reproducible(self):
+        gz_path = gzip_file(self.page)
+        with gzip.open(gz_path, 'rb') as f:
+            self.assertEqual(f.read(), ("<p>post</p>" * 50).encode())
+        with open(gz_path, 'rb') as f:
+            first = f.read()
+        gzip_file(self.page)
+        with open(gz_path, 'rb') as f:
+            self.assertEqual(f.read(), first)
+
+    def test_compresses_text_files_only(self):
+        stats = precompress_directory(self.root)
+        self.assertEqual(stats.compressed, 2)
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+        self.assertFalse(os.path.exists(self.image + ".gz"))
+
+    def test_unchanged_files_are_skipped(self):
+        manifest = BuildManifest()
+        precompress_directory(self.root, manifest)
+        self.assertEqual(set(manifest.compressed), {"index.css", os.path.join("blog", "index.html")})
+
+        # Rewriting the same content changes the mtime but not the hash
+        with open(self.css, 'w') as f:
+            f.write("body {}")
+        stats = precompress_directory(self.root, manifest)
+        self.assertEqual((stats.compressed, stats.unchanged), (0, 2))
+
+        with open(self.css, 'w') as f:
+            f.write("body { margin: 0; }")
+        stats = precompress_directory(self.root, manifest, jobs=2)
+        self.assertEqual((stats.compressed, stats.unchanged), (1, 1))
+        with gzip.open(self.css + ".gz", 'rt') as f:
+            self.assertEqual(f.read(), "body { margin: 0; }")
+
+    def test_missing_copy_is_rewritten(self):
+        manifest = BuildManifest()
+        precompress_directory(self.root, manifest)
+        os.remove(self.css + ".gz")
+        stats = precompress_directory(self.root, manifest)
+        self.assertEqual(stats.compressed, 1)
+        self.assertTrue(os.path.exists(self.css + ".gz"))
+
+    def test_orphaned_copies_are_removed(self):
+        manifest = BuildManifest()
+        precompress_directory(self.root, manifest)
+        os.remove(self.page)
+        stats = precompress_directory(self.root, manifest)
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertNotIn(os.path.join("blog", "index.html"), manifest.compressed)
+
+
+if __name__ == "__main__":
+    unittest.main()
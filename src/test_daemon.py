@@ -0,0 +1,97 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from daemon import serve, send_request
+from main import BuildDaemon, BuildConfig
+from test_main import TEMPLATE, write_file
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = self.tmp.name
+        write_file(os.path.join(self.base, "template.html"), TEMPLATE)
+        write_file(os.path.join(self.base, "content", "index.md"), "# Home\n\n[Post](/blog/post)")
+        write_file(os.path.join(self.base, "content", "blog", "index.md"), "# Blog\n\nFirst draft")
+        write_file(os.path.join(self.base, "static", "index.css"), "body {}")
+        self.socket_path = os.path.join(self.base, "daemon.sock")
+        self.daemon = BuildDaemon(BuildConfig(base_dir=self.base))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _start(self):
+        thread = threading.Thread(target=serve, args=(self.socket_path, self.daemon.handle))
+        thread.start()
+        while not os.path.exists(self.socket_path):
+            thread.join(0.01)
+        self.addCleanup(thread.join)
+        self.addCleanup(send_request, self.socket_path, {"command": "stop"})
+
+    def _read(self, *parts):
+        with open(os.path.join(self.base, "docs", *parts), 'r') as f:
+            return f.read()
+
+    def test_build_and_rebuild(self):
+        self._start()
+        response = send_request(self.socket_path, {"command": "build"})
+        self.assertTrue(response["ok"])
+        self.assertIn("Generated pages: 2 written, 0 unchanged", response["output"])
+        self.assertIn("First draft", self._read("blog", "index.html"))
+
+        write_file(os.path.join(self.base, "content", "blog", "index.md"), "# Blog\n\nSecond draft")
+        os.remove(os.path.join(self.base, "static", "index.css"))
+        response = send_request(self.socket_path, {"command": "rebuild", "paths": [
+            os.path.join(self.base, "content", "blog"), os.path.join(self.base, "static", "index.css")]})
+        self.assertEqual((response["ok"], response["errors"]), (True, []))
+        self.assertIn("Rebuilt 1 changed and 1 removed file(s)", response["output"])
+        self.assertIn("Second draft", self._read("blog", "index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.base, "docs", "index.css")))
+
+        response = send_request(self.socket_path, {"command": "status"})
+        self.assertIn("2 request(s) served, 2 page(s) built", response["output"])
+
+    def test_reports_page_errors(self):
+        self._start()
+        write_file(os.path.join(self.base, "content", "broken.md"), "no title here")
+        response = send_request(self.socket_path, {"command": "build"})
+        self.assertFalse(response["ok"])
+        self.assertEqual([path for path, _ in response["errors"]], [os.path.join(self.base, "content", "broken.md")])
+        # The daemon keeps serving after a failed build
+        self.assertTrue(send_request(self.socket_path, {"command": "status"})["ok"])
+
+    def test_unknown_command(self):
+        response = self.daemon.handle({"command": "deploy"})
+        self.assertFalse(response["ok"])
+        self.assertIn("deploy", response["error"])
+
+    def test_stop_removes_socket(self):
+        thread = threading.Thread(target=serve, args=(self.socket_path, self.daemon.handle))
+        thread.start()
+        while not os.path.exists(self.socket_path):
+            thread.join(0.01)
+        self.assertTrue(send_request(self.socket_path, {"command": "stop"})["ok"])
+        thread.join()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_refuses_to_replace_a_listening_daemon(self):
+        self._start()
+        with self.assertRaises(ValueError):
+            serve(self.socket_path, self.daemon.handle)
+
+    def test_replaces_stale_socket(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+        self._start()
+        self.assertTrue(send_request(self.socket_path, {"command": "status"})["ok"])
+
+    def test_no_daemon(self):
+        with self.assertRaises(ValueError):
+            send_request(self.socket_path, {"command": "status"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import json
+import tempfile
+import unittest
+from deploy import scan_outputs, diff_outputs, write_deploy_manifest
+
+
+class TestDeployManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "docs")
+        self.path = os.path.join(self.tmp.name, "deploy.json")
+        self._write("index.html", "<p>home</p>")
+        self._write(os.path.join("blog", "index.html"), "<p>blog</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_scan_records_size_and_hash(self):
+        files = scan_outputs(self.root)
+        self.assertEqual(sorted(files), ["blog/index.html", "index.html"])
+        self.assertEqual(files["index.html"]["size"], len("<p>home</p>"))
+        self.assertEqual(len(files["index.html"]["hash"]), 64)
+
+    def test_scan_reuses_hash_when_stat_matches(self):
+        previous = scan_outputs(self.root)
+        previous["index.html"]["hash"] = "cached"
+        self.assertEqual(scan_outputs(self.root, previous)["index.html"]["hash"], "cached")
+
+    def test_diff(self):
+        old = {"a": {"hash": "1"}, "b": {"hash": "2"}, "c": {"hash": "3"}}
+        new = {"a": {"hash": "1"}, "b": {"hash": "x"}, "d": {"hash": "4"}}
+        self.assertEqual(diff_outputs(old, new), {"added": ["d"], "modified": ["b"], "removed": ["c"]})
+
+    def test_delta_against_previous_manifest(self):
+        delta = write_deploy_manifest(self.root, self.path)
+        self.assertEqual(delta["added"], ["blog/index.html", "index.html"])
+
+        self._write("index.html", "<p>home, edited</p>")
+        os.remove(os.path.join(self.root, "blog", "index.html"))
+        self._write("new.html", "<p>new</p>")
+        delta = write_deploy_manifest(self.root, self.path)
+        self.assertEqual(delta, {"added": ["new.html"], "modified": ["index.html"], "removed": ["blog/index.html"]})
+
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data["delta"], delta)
+        self.assertEqual(sorted(data["files"]), ["index.html", "new.html"])
+
+    def test_rewriting_same_bytes_is_not_a_modification(self):
+        write_deploy_manifest(self.root, self.path)
+        self._write("index.html", "<p>home</p>")
+        os.utime(os.path.join(self.root, "index.html"), ns=(0, 0))
+        delta = write_deploy_manifest(self.root, self.path)
+        self.assertEqual(delta, {"added": [], "modified": [], "removed": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import io
+import pickle
 import unittest
 import htmlnode
 
@@ -145,5 +147,72 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(node1, node2)
         self.assertNotEqual(node1, node3)
 
+class TestCompactNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (htmlnode.HTMLNode(), htmlnode.LeafNode("p", "x"),
+                     htmlnode.ParentNode("div", [htmlnode.LeafNode("p", "x")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+    
+    def test_leaves_share_empty_children_and_props(self):
+        leaf1 = htmlnode.LeafNode("p", "one")
+        leaf2 = htmlnode.LeafNode("b", "two")
+        self.assertEqual(leaf1.children, ())
+        self.assertIs(leaf1.props, leaf2.props)
+        self.assertEqual(leaf1.props, {})
+    
+    def test_shared_empty_props_are_read_only(self):
+        leaf = htmlnode.LeafNode("p", "x")
+        with self.assertRaises(TypeError):
+            leaf.props["class"] = "note"
+    
+    def test_leaf_equals_plain_node(self):
+        self.assertEqual(htmlnode.LeafNode("p", "x"), htmlnode.HTMLNode("p", "x"))
+    
+    def test_pickle_round_trip(self):
+        node = htmlnode.ParentNode("div", [
+            htmlnode.LeafNode("a", "Link", {"href": "/blog"}),
+            htmlnode.LeafNode(None, "text"),
+        ])
+        copy = pickle.loads(pickle.dumps(node))
+        self.assertEqual(copy, node)
+        self.assertIs(copy.children[1].props, htmlnode.EMPTY_PROPS)
+
+class TestStreamingHtml(unittest.TestCase):
+    def _tree(self):
+        return htmlnode.ParentNode(
+            "div",
+            [
+                htmlnode.ParentNode("p", [htmlnode.LeafNode("b", "Bold"), htmlnode.LeafNode(None, " text")]),
+                htmlnode.LeafNode("a", "Link", {"href": "/blog"}),
+            ],
+        )
+    
+    def test_iter_html_chunks(self):
+        self.assertEqual(list(self._tree().iter_html()), [
+            "<div>", "<p>", "<b>Bold</b>", " text", "</p>", '<a href="/blog">Link</a>', "</div>",
+        ])
+    
+    def test_iter_html_matches_to_html(self):
+        tree = self._tree()
+        self.assertEqual("".join(tree.iter_html()), tree.to_html())
+    
+    def test_write_html(self):
+        stream = io.StringIO()
+        self._tree().write_html(stream)
+        self.assertEqual(stream.getvalue(), self._tree().to_html())
+    
+    def test_iter_html_deep_tree(self):
+        node = htmlnode.LeafNode(None, "x")
+        for _ in range(5000):
+            node = htmlnode.ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(html.count("</span>"), 5000)
+    
+    def test_iter_html_nested_error(self):
+        node = htmlnode.ParentNode("div", [htmlnode.ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,168 @@
+import os
+import gzip
+import tempfile
+import unittest
+from main import (discover_pages, generate_pages_recursive, generate_pages_parallel, make_url_rewriter,
+                  build_site, BuildConfig, MemoryOutput)
+from manifest import BuildManifest
+from sync import WriteStats
+
+TEMPLATE = """<html><head><title>{{ Title }}</title><link rel="stylesheet" href="./index.css"></head>
+<body>{{ Content }}</body></html>"""
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+def read_tree(root):
+    files = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, 'r') as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)")
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n![img](/images/a.png)")
+        write_file(os.path.join(self.content, "notes.txt"), "not a page")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_discover_pages_sorted(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        pages = discover_pages(self.content, dest)
+        self.assertEqual(pages, [
+            (os.path.join(self.content, "blog", "post", "index.md"),
+             os.path.join(dest, "blog", "post", "index.html")),
+            (os.path.join(self.content, "index.md"), os.path.join(dest, "index.html")),
+        ])
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial)
+        errors = generate_pages_parallel(self.content, self.template, parallel, jobs=2)
+        self.assertEqual(errors, [])
+        self.assertEqual(read_tree(serial), read_tree(parallel))
+        self.assertIn('href="../../index.css"', read_tree(parallel)["blog/post/index.html"])
+
+    def test_parallel_reports_page_errors(self):
+        write_file(os.path.join(self.content, "broken.md"), "no title here")
+        dest = os.path.join(self.tmp.name, "docs")
+        errors = generate_pages_parallel(self.content, self.template, dest, jobs=2)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][0], os.path.join(self.content, "broken.md"))
+        self.assertIsInstance(errors[0][1], ValueError)
+        self.assertTrue(os.path.exists(os.path.join(dest, "index.html")))
+
+    def test_manifest_skips_unchanged_pages(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        manifest = BuildManifest()
+        generate_pages_parallel(self.content, self.template, dest, jobs=2, manifest=manifest)
+        self.assertEqual(set(manifest.pages), {"index.html", os.path.join("blog", "post", "index.html")})
+        mtime = os.stat(os.path.join(dest, "index.html")).st_mtime_ns
+        manifest = BuildManifest(pages=manifest.pages)
+        generate_pages_recursive(self.content, self.template, dest, manifest=manifest)
+        self.assertEqual(os.stat(os.path.join(dest, "index.html")).st_mtime_ns, mtime)
+        self.assertEqual(manifest.prune(), {})
+
+    def test_unchanged_output_is_not_rewritten(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, dest)
+        index = os.path.join(dest, "index.html")
+        os.utime(index, ns=(0, 0))
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nEdited")
+        # Without a manifest every page is rendered, but only changed ones are written
+        stats = WriteStats()
+        generate_pages_recursive(self.content, self.template, dest, stats=stats)
+        self.assertEqual((stats.written, stats.unchanged), (1, 1))
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+
+        stats = WriteStats()
+        generate_pages_parallel(self.content, self.template, dest, jobs=2, stats=stats)
+        self.assertEqual((stats.written, stats.unchanged), (0, 2))
+
+    def test_links_are_rewritten_relative_to_page(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, dest)
+        pages = read_tree(dest)
+        self.assertIn('<a href="./blog/post">Post</a>', pages["index.html"])
+        self.assertIn('<img src="../../images/a.png" alt="img">', pages["blog/post/index.html"])
+
+    def test_code_blocks_are_not_rewritten(self):
+        write_file(os.path.join(self.content, "index.md"), '# Home\n\n```\n<a href="/blog">\n```')
+        dest = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, dest)
+        self.assertIn('<code><a href="/blog"></code>', read_tree(dest)["index.html"])
+
+
+class TestBuildSite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = self.tmp.name
+        write_file(os.path.join(self.base, "template.html"), TEMPLATE)
+        write_file(os.path.join(self.base, "content", "index.md"), "# Home\n\n[Post](/blog/post)")
+        write_file(os.path.join(self.base, "content", "blog", "index.md"), "# Blog\n\n![img](/images/a.png)")
+        write_file(os.path.join(self.base, "static", "index.css"), "body {}")
+        write_file(os.path.join(self.base, "static", "images", "a.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_directory_build(self):
+        result = build_site(BuildConfig(base_dir=self.base))
+        self.assertEqual(result.errors, [])
+        self.assertEqual(set(read_tree(os.path.join(self.base, "docs"))),
+                         {"index.html", "index.css", os.path.join("blog", "index.html"),
+                          os.path.join("images", "a.png")})
+        self.assertEqual(set(result.manifest.pages), {"index.html", os.path.join("blog", "index.html")})
+        self.assertTrue(os.path.exists(os.path.join(self.base, ".build-manifest.json")))
+
+    def test_memory_build_matches_directory_build(self):
+        build_site(BuildConfig(base_dir=self.base))
+        files = read_tree(os.path.join(self.base, "docs"))
+        output = MemoryOutput()
+        result = build_site(BuildConfig(base_dir=self.base, output=output))
+        self.assertIs(result.output, output)
+        self.assertEqual({path: data.decode() for path, data in output.items()},
+                         {path.replace(os.sep, "/"): content for path, content in files.items()})
+
+    def test_memory_build_touches_nothing_on_disk(self):
+        before = sorted(os.listdir(self.base))
+        output = MemoryOutput()
+        build_site(BuildConfig(base_dir=self.base, output=output, gzip=True))
+        self.assertEqual(sorted(os.listdir(self.base)), before)
+        self.assertIn('src="../images/a.png"', gzip.decompress(output["blog/index.html.gz"]).decode())
+
+    def test_memory_build_reports_page_errors(self):
+        write_file(os.path.join(self.base, "content", "broken.md"), "no title here")
+        result = build_site(BuildConfig(base_dir=self.base, output=MemoryOutput()))
+        self.assertEqual([path for path, _ in result.errors], [os.path.join(self.base, "content", "broken.md")])
+        self.assertIn("index.html", result.output)
+
+
+class TestUrlRewriter(unittest.TestCase):
+    def test_root_relative_urls(self):
+        rewrite = make_url_rewriter("../")
+        self.assertEqual(rewrite("/blog/post"), "../blog/post")
+        self.assertEqual(rewrite("/"), "../")
+
+    def test_other_urls_unchanged(self):
+        rewrite = make_url_rewriter("../")
+        for url in ("https://example.com", "//cdn.example.com/a.js", "post.html", "#top"):
+            self.assertEqual(rewrite(url), url)
+
+
+if __name__ == "__main__":
+    unittest.main()
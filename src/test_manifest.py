@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from manifest import BuildManifest, hash_text, hash_file
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.template = os.path.join(self.dir, "template.html")
+        self.dest = os.path.join(self.dir, "index.html")
+        with open(self.template, 'w') as f:
+            f.write("<html>{{ Content }}</html>")
+        with open(self.dest, 'w') as f:
+            f.write("<html>page</html>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _record(self, manifest, source_hash="src"):
+        manifest.record("index.html", "index.md", source_hash, self.template,
+                        manifest.template_hash(self.template), self.dest, hash_file(self.dest))
+
+    def test_hash_text_matches_hash_file(self):
+        self.assertEqual(hash_text("<html>page</html>"), hash_file(self.dest))
+
+    def test_unknown_page_is_not_fresh(self):
+        manifest = BuildManifest()
+        self.assertFalse(manifest.is_fresh("index.html", "src", "tpl", self.dest))
+
+    def test_recorded_page_is_fresh(self):
+        manifest = BuildManifest()
+        self._record(manifest)
+        template_hash = manifest.template_hash(self.template)
+        self.assertTrue(manifest.is_fresh("index.html", "src", template_hash, self.dest))
+
+    def test_source_change_invalidates(self):
+        manifest = BuildManifest()
+        self._record(manifest)
+        template_hash = manifest.template_hash(self.template)
+        self.assertFalse(manifest.is_fresh("index.html", "changed", template_hash, self.dest))
+
+    def test_template_change_invalidates(self):
+        manifest = BuildManifest()
+        self._record(manifest)
+        self.assertFalse(manifest.is_fresh("index.html", "src", "other-template", self.dest))
+
+    def test_modified_output_invalidates(self):
+        manifest = BuildManifest()
+        self._record(manifest)
+        template_hash = manifest.template_hash(self.template)
+        with open(self.dest, 'w') as f:
+            f.write("<html>edited by hand</html>")
+        self.assertFalse(manifest.is_fresh("index.html", "src", template_hash, self.dest))
+
+    def test_missing_output_invalidates(self):
+        manifest = BuildManifest()
+        self._record(manifest)
+        template_hash = manifest.template_hash(self.template)
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_fresh("index.html", "src", template_hash, self.dest))
+
+    def test_save_and_load_round_trip(self):
+        path = os.path.join(self.dir, "manifest.json")
+        manifest = BuildManifest(path)
+        self._record(manifest)
+        manifest.compressed["index.html"] = {"hash": "h", "size": 1, "mtime_ns": 2}
+        manifest.shard = (2, 3)
+        manifest.save()
+        loaded = BuildManifest.load(path)
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertEqual(loaded.compressed, manifest.compressed)
+        self.assertEqual(loaded.shard, (2, 3))
+
+    def test_load_missing_or_corrupt_is_empty(self):
+        path = os.path.join(self.dir, "manifest.json")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+        with open(path, 'w') as f:
+            f.write("not json")
+        self.assertEqual(BuildManifest.load(path).pages, {})
+
+    def test_prune_returns_unseen_entries(self):
+        manifest = BuildManifest()
+        self._record(manifest)
+        fresh = BuildManifest(pages=manifest.pages)
+        stale = fresh.prune()
+        self.assertIn("index.html", stale)
+        self.assertEqual(fresh.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
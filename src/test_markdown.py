@@ -1,5 +1,7 @@
+import io
 import unittest
 from markdown import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, extract_title
+from markdown import iter_markdown_blocks, iter_markdown_html, extract_title_from_lines
 from textnode import TextNode, TextType
 
 
@@ -247,6 +249,20 @@ class TestSplitNodesLink(unittest.TestCase):
         result = split_nodes_link([node])
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0].text_type, TextType.BOLD)
+    
+    def test_split_link_after_image_with_same_text(self):
+        node = TextNode("![x](u) then [x](u)", TextType.TEXT)
+        result = split_nodes_link([node])
+        self.assertEqual(result, [
+            TextNode("![x](u) then ", TextType.TEXT),
+            TextNode("x", TextType.LINK, "u"),
+        ])
+    
+    def test_split_many_links(self):
+        text = " ".join(f"[link {i}](/page/{i})" for i in range(1000))
+        result = split_nodes_link([TextNode(text, TextType.TEXT)])
+        self.assertEqual(len(result), 1999)
+        self.assertEqual(result[-1], TextNode("link 999", TextType.LINK, "/page/999"))
 
 
 class TestTextToTextnodes(unittest.TestCase):
@@ -318,6 +334,28 @@ class TestTextToTextnodes(unittest.TestCase):
         self.assertEqual(result[2].text, "bold2")
         self.assertEqual(result[2].text_type, TextType.BOLD)
 
+    
+    def test_delimiters_inside_code_left_alone(self):
+        result = text_to_textnodes("Call `snake_case(*args)` now")
+        self.assertEqual(result, [
+            TextNode("Call ", TextType.TEXT),
+            TextNode("snake_case(*args)", TextType.CODE),
+            TextNode(" now", TextType.TEXT),
+        ])
+    
+    def test_link_with_underscore_url(self):
+        result = text_to_textnodes("See [the docs](https://example.com/my_page) and _this_")
+        self.assertEqual(result, [
+            TextNode("See ", TextType.TEXT),
+            TextNode("the docs", TextType.LINK, "https://example.com/my_page"),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("this", TextType.ITALIC),
+        ])
+    
+    def test_unclosed_delimiter_raises_error(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **unclosed")
+
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks_standard(self):
@@ -600,6 +638,41 @@ This is **bold** and `code`.
         self.assertIn('<img src="https://example.com/img.png" alt="alt text"', html)
 
 
+class TestStreamingMarkdown(unittest.TestCase):
+    SAMPLES = [
+        "# Title\n\nA paragraph with **bold**.\n\n- one\n- two\n",
+        "  Block 1  \n\n  Block 2  ",
+        "Block 1\n\n\n\nBlock 2\n\n\nBlock 3",
+        "   \n\n   ",
+        "line one\n   \nstill the same block",
+        "",
+    ]
+    
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        for markdown in self.SAMPLES:
+            blocks = list(iter_markdown_blocks(io.StringIO(markdown)))
+            self.assertEqual(blocks, markdown_to_blocks(markdown), repr(markdown))
+    
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "first block\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_markdown_blocks(lines())), "first block")
+    
+    def test_iter_html_matches_to_html(self):
+        markdown = "# Title\n\n> a quote\n\n```\ncode\n```\n\n1. one\n2. [two](/two)"
+        html = "".join(iter_markdown_html(io.StringIO(markdown)))
+        self.assertEqual(html, markdown_to_html_node(markdown).to_html())
+    
+    def test_iter_html_empty_document_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_markdown_html(io.StringIO("\n\n")))
+    
+    def test_extract_title_from_lines(self):
+        lines = io.StringIO("\n   # Padded Title  \n\ntext\n")
+        self.assertEqual(extract_title_from_lines(lines), "Padded Title")
+
 class TestExtractTitle(unittest.TestCase):
     def test_extract_title_simple(self):
         markdown = "# Hello"
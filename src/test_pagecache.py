@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from main import discover_pages, generate_pages_recursive
+from pagecache import PageCache
+from pipeline import generate_pages_pipelined
+from test_main import TEMPLATE, write_file, read_tree
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "pages")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_put(self):
+        cache = PageCache(self.root)
+        key = cache.key("source", "template", "./")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<p>page</p>")
+        self.assertEqual(cache.get(key), "<p>page</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_covers_every_input(self):
+        cache = PageCache(self.root)
+        key = cache.key("source", "template", "./")
+        self.assertNotEqual(key, cache.key("other", "template", "./"))
+        self.assertNotEqual(key, cache.key("source", "other", "./"))
+        self.assertNotEqual(key, cache.key("source", "template", "../"))
+        self.assertEqual(key, PageCache(self.tmp.name).key("source", "template", "./"))
+
+    def test_put_leaves_no_temporary_files(self):
+        cache = PageCache(self.root)
+        key = cache.key("source", "template", "./")
+        cache.put(key, "<p>one</p>")
+        cache.put(key, "<p>two</p>")
+        files = [name for _, _, names in os.walk(self.root) for name in names]
+        self.assertEqual(files, [key + ".html"])
+        self.assertEqual(cache.get(key), "<p>two</p>")
+
+    def test_lru_eviction(self):
+        cache = PageCache(self.root, max_bytes=350)
+        keys = [cache.key(f"page {i}", "template", "./") for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, "x" * 100)
+            # Spread mtimes out so the order doesn't depend on timer resolution
+            os.utime(cache._path(key), ns=(i * 10**9, i * 10**9))
+        cache.get(keys[0])
+        self.assertEqual(cache.evict(), 1)
+        self.assertLessEqual(cache.total_bytes(), 350)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+
+    def test_evict_missing_directory(self):
+        self.assertEqual(PageCache(self.root, max_bytes=0).evict(), 0)
+
+
+class TestPageCacheBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)")
+        for i in range(5):
+            write_file(os.path.join(self.content, "blog", f"post-{i}", "index.md"),
+                       f"# Post {i}\n\n![img](/images/{i}.png)")
+        self.cache_dir = os.path.join(self.tmp.name, "pages")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_second_checkout_reuses_pages(self):
+        first = os.path.join(self.tmp.name, "first")
+        second = os.path.join(self.tmp.name, "second")
+        generate_pages_recursive(self.content, self.template, first, page_cache=PageCache(self.cache_dir))
+        cache = PageCache(self.cache_dir)
+        generate_pages_recursive(self.content, self.template, second, page_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (6, 0))
+        self.assertEqual(read_tree(second), read_tree(first))
+
+    def test_template_change_misses(self):
+        dest = os.path.join(self.tmp.name, "docs")
+        generate_pages_recursive(self.content, self.template, dest, page_cache=PageCache(self.cache_dir))
+        write_file(self.template, TEMPLATE.replace("<html>", "<html lang=\"en\">"))
+        cache = PageCache(self.cache_dir)
+        generate_pages_recursive(self.content, self.template, dest, page_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 6))
+
+    def test_pipeline_uses_cache(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        generate_pages_recursive(self.content, self.template, serial)
+        first = os.path.join(self.tmp.name, "first")
+        generate_pages_pipelined(discover_pages(self.content, first), self.template, first,
+                                 page_cache=PageCache(self.cache_dir))
+        second = os.path.join(self.tmp.name, "second")
+        cache = PageCache(self.cache_dir)
+        errors = generate_pages_pipelined(discover_pages(self.content, second), self.template, second,
+                                          page_cache=cache)
+        self.assertEqual(errors, [])
+        self.assertEqual((cache.hits, cache.misses), (6, 0))
+        self.assertEqual(read_tree(first), read_tree(serial))
+        self.assertEqual(read_tree(second), read_tree(serial))
+
+
+if __name__ == "__main__":
+    unittest.main()
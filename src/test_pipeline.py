@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from blockcache import BlockCache
+from main import discover_pages, generate_pages_recursive
+from manifest import BuildManifest
+from pipeline import generate_pages_pipelined
+from sync import WriteStats
+from test_main import TEMPLATE, write_file, read_tree
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post)")
+        for i in range(20):
+            write_file(os.path.join(self.content, "blog", f"post-{i}", "index.md"),
+                       f"# Post {i}\n\n![img](/images/{i}.png)\n\n- one\n- two")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _pages(self):
+        return discover_pages(self.content, self.dest)
+
+    def test_matches_serial_build(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        generate_pages_recursive(self.content, self.template, serial)
+        errors = generate_pages_pipelined(self._pages(), self.template, self.dest, io_threads=3, queue_size=2)
+        self.assertEqual(errors, [])
+        self.assertEqual(read_tree(self.dest), read_tree(serial))
+
+    def test_render_in_processes(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        generate_pages_recursive(self.content, self.template, serial)
+        errors = generate_pages_pipelined(self._pages(), self.template, self.dest, jobs=2)
+        self.assertEqual(errors, [])
+        self.assertEqual(read_tree(self.dest), read_tree(serial))
+
+    def test_reports_page_errors_in_order(self):
+        write_file(os.path.join(self.content, "a.md"), "no title here")
+        write_file(os.path.join(self.content, "b.md"), "# Unclosed **bold")
+        errors = generate_pages_pipelined(self._pages(), self.template, self.dest)
+        self.assertEqual([path for path, _ in errors],
+                         [os.path.join(self.content, "a.md"), os.path.join(self.content, "b.md")])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_manifest_skips_unchanged_pages(self):
+        manifest = BuildManifest()
+        generate_pages_pipelined(self._pages(), self.template, self.dest, manifest=manifest)
+        self.assertEqual(len(manifest.pages), 21)
+        mtime = os.stat(os.path.join(self.dest, "index.html")).st_mtime_ns
+        manifest = BuildManifest(pages=manifest.pages)
+        stats = WriteStats()
+        generate_pages_pipelined(self._pages(), self.template, self.dest, manifest=manifest, stats=stats)
+        self.assertEqual((stats.written, stats.unchanged), (0, 21))
+        self.assertEqual(os.stat(os.path.join(self.dest, "index.html")).st_mtime_ns, mtime)
+        self.assertEqual(manifest.prune(), {})
+
+    def test_identical_output_is_not_rewritten(self):
+        generate_pages_pipelined(self._pages(), self.template, self.dest)
+        index = os.path.join(self.dest, "index.html")
+        os.utime(index, ns=(0, 0))
+        stats = WriteStats()
+        generate_pages_pipelined(self._pages(), self.template, self.dest, stats=stats)
+        self.assertEqual((stats.written, stats.unchanged), (0, 21))
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+
+    def test_block_cache_usable_afterwards(self):
+        cache = BlockCache(os.path.join(self.tmp.name, "blocks.sqlite"))
+        generate_pages_pipelined(self._pages(), self.template, self.dest, block_cache=cache)
+        # The render thread's connection is closed, so this thread can open its own
+        self.assertEqual(cache.get("- one\n- two", "../../"), "<ul><li>one</li><li>two</li></ul>")
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from main import build_site, BuildConfig, MANIFEST_FILENAME
+from manifest import BuildManifest
+from shard import shard_dir, merge_shards
+from test_main import TEMPLATE, write_file, read_tree
+
+
+class TestShardedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = self.tmp.name
+        write_file(os.path.join(self.base, "template.html"), TEMPLATE)
+        write_file(os.path.join(self.base, "content", "index.md"), "# Home\n\n[Post](/blog/post-1)")
+        for i in range(12):
+            write_file(os.path.join(self.base, "content", "blog", f"post-{i}", "index.md"), f"# Post {i}")
+        write_file(os.path.join(self.base, "static", "index.css"), "body {}")
+        write_file(os.path.join(self.base, "static", "images", "a.png"), "png")
+        self.docs = os.path.join(self.base, "docs")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _build_shards(self, count):
+        dirs = []
+        for index in range(1, count + 1):
+            directory = shard_dir(self.base, (index, count))
+            build_site(BuildConfig(base_dir=self.base, output=os.path.join(directory, "docs"), shard=(index, count)))
+            dirs.append(directory)
+        return dirs
+
+    def test_shards_partition_the_site(self):
+        dirs = self._build_shards(3)
+        shard_files = [set(read_tree(os.path.join(directory, "docs"))) for directory in dirs]
+        self.assertEqual(sum(len(files) for files in shard_files), len(set().union(*shard_files)))
+        self.assertEqual(len(set().union(*shard_files)), 15)
+        manifest = BuildManifest.load(os.path.join(dirs[0], MANIFEST_FILENAME))
+        self.assertEqual(manifest.shard, (1, 3))
+
+    def test_merge_matches_whole_build(self):
+        whole = os.path.join(self.base, "whole")
+        build_site(BuildConfig(base_dir=self.base, output=whole))
+        dirs = self._build_shards(3)
+        manifest_path = os.path.join(self.base, MANIFEST_FILENAME)
+        stats = merge_shards(dirs, self.docs, manifest_path)
+        self.assertEqual(stats.copied, 15)
+        self.assertEqual(read_tree(self.docs), read_tree(whole))
+
+        merged = BuildManifest.load(manifest_path)
+        self.assertEqual(len(merged.pages), 13)
+        self.assertIsNone(merged.shard)
+        # The merged manifest lets an ordinary build skip every page
+        result = build_site(BuildConfig(base_dir=self.base))
+        self.assertEqual((result.stats.written, result.stats.unchanged), (0, 13))
+
+    def test_merge_removes_files_no_shard_produced(self):
+        write_file(os.path.join(self.docs, "old.html"), "stale")
+        stats = merge_shards(self._build_shards(2), self.docs, os.path.join(self.base, MANIFEST_FILENAME))
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "old.html")))
+
+    def test_merge_requires_every_shard(self):
+        dirs = self._build_shards(3)
+        with self.assertRaisesRegex(ValueError, "Expected shards 1 to 3"):
+            merge_shards(dirs[:2], self.docs, os.path.join(self.base, MANIFEST_FILENAME))
+        self.assertFalse(os.path.exists(self.docs))
+
+    def test_merge_rejects_collisions(self):
+        dirs = self._build_shards(2)
+        write_file(os.path.join(dirs[0], "docs", "clash.html"), "one")
+        write_file(os.path.join(dirs[1], "docs", "clash.html"), "two")
+        with self.assertRaisesRegex(ValueError, "clash.html"):
+            merge_shards(dirs, self.docs, os.path.join(self.base, MANIFEST_FILENAME))
+
+    def test_identical_copies_are_not_collisions(self):
+        dirs = self._build_shards(2)
+        for directory in dirs:
+            write_file(os.path.join(directory, "docs", "same.txt"), "same")
+        merge_shards(dirs, self.docs, os.path.join(self.base, MANIFEST_FILENAME))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "same.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
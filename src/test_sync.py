@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+import sync
+from sync import sync_directory, replace_if_changed
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        write_file(os.path.join(self.src, "index.css"), "body {}")
+        write_file(os.path.join(self.src, "images", "a.png"), "png-bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_initial_sync_copies_everything(self):
+        stats = sync_directory(self.src, self.dest)
+        self.assertEqual((stats.copied, stats.unchanged, stats.removed), (2, 0, 0))
+        with open(os.path.join(self.dest, "images", "a.png")) as f:
+            self.assertEqual(f.read(), "png-bytes")
+
+    def test_second_sync_copies_nothing(self):
+        sync_directory(self.src, self.dest)
+        stats = sync_directory(self.src, self.dest)
+        self.assertEqual((stats.copied, stats.unchanged, stats.removed), (0, 2, 0))
+
+    def test_changed_file_is_copied(self):
+        sync_directory(self.src, self.dest)
+        write_file(os.path.join(self.src, "index.css"), "body { color: red }")
+        stats = sync_directory(self.src, self.dest, compare="hash")
+        self.assertEqual(stats.copied, 1)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    def test_orphans_removed_but_kept_files_survive(self):
+        sync_directory(self.src, self.dest)
+        write_file(os.path.join(self.dest, "old.txt"), "orphan")
+        write_file(os.path.join(self.dest, "blog", "index.html"), "<p>page</p>")
+        write_file(os.path.join(self.dest, "gone", "stale.txt"), "orphan")
+        stats = sync_directory(self.src, self.dest, keep=lambda path: path.endswith(".html"))
+        self.assertEqual(stats.removed, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old.txt")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "gone")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "index.html")))
+
+    def test_hardlink_mode(self):
+        sync_directory(self.src, self.dest, link=True)
+        src_stat = os.stat(os.path.join(self.src, "index.css"))
+        dest_stat = os.stat(os.path.join(self.dest, "index.css"))
+        self.assertEqual(src_stat.st_ino, dest_stat.st_ino)
+
+    def test_large_files_use_copy_file_range(self):
+        threshold = sync.LARGE_FILE_THRESHOLD
+        sync.LARGE_FILE_THRESHOLD = 1
+        try:
+            stats = sync_directory(self.src, self.dest)
+        finally:
+            sync.LARGE_FILE_THRESHOLD = threshold
+        self.assertEqual(stats.copied, 2)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_missing_source_raises(self):
+        with self.assertRaises(ValueError):
+            sync_directory(os.path.join(self.tmp.name, "nope"), self.dest)
+
+
+class TestReplaceIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmp.name, "index.html")
+        self.tmp_path = self.dest + ".tmp"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_missing_dest_is_written(self):
+        self._write(self.tmp_path, "<p>new</p>")
+        self.assertTrue(replace_if_changed(self.tmp_path, self.dest))
+        self.assertFalse(os.path.exists(self.tmp_path))
+
+    def test_identical_dest_is_left_alone(self):
+        self._write(self.dest, "<p>same</p>")
+        os.utime(self.dest, ns=(0, 0))
+        self._write(self.tmp_path, "<p>same</p>")
+        self.assertFalse(replace_if_changed(self.tmp_path, self.dest))
+        self.assertFalse(os.path.exists(self.tmp_path))
+        self.assertEqual(os.stat(self.dest).st_mtime_ns, 0)
+
+    def test_same_size_different_bytes_is_written(self):
+        self._write(self.dest, "<p>old</p>")
+        self._write(self.tmp_path, "<p>new</p>")
+        self.assertTrue(replace_if_changed(self.tmp_path, self.dest))
+        with open(self.dest) as f:
+            self.assertEqual(f.read(), "<p>new</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
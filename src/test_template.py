@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_literals_and_slots(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.parts, ["<title>", None, "</title><body>", None, "</body>"])
+        self.assertEqual(template.placeholders, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        html = template.render(Title="Home", Content="<p>hi</p>")
+        self.assertEqual(html, "<title>Home</title><body><p>hi</p></body>")
+
+    def test_render_matches_str_replace(self):
+        source = "<h1>{{ Title }}</h1>{{ Content }}<footer>{{ Title }}</footer>"
+        expected = source.replace("{{ Title }}", "T").replace("{{ Content }}", "C")
+        self.assertEqual(Template(source).render(Title="T", Content="C"), expected)
+
+    def test_additional_placeholders(self):
+        template = Template('<meta name="author" content="{{ Author }}">{{ Content }}')
+        html = template.render(Author="Tolkien", Content="x")
+        self.assertEqual(html, '<meta name="author" content="Tolkien">x')
+
+    def test_missing_value_left_untouched(self):
+        template = Template("{{ Title }} - {{ Missing }}")
+        self.assertEqual(template.render(Title="Home"), "Home - {{ Missing }}")
+
+    def test_values_are_not_reinterpreted(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render(Title="{{ Content }}", Content="c"), "{{ Content }}|c")
+
+    def test_iter_render_streams_iterables(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        chunks = list(template.iter_render(Title="Home", Content=iter(["<p>", "hi", "</p>"])))
+        self.assertEqual(chunks, ["<title>", "Home", "</title>", "<p>", "hi", "</p>"])
+
+    def test_no_placeholders(self):
+        template = Template("<html></html>")
+        self.assertEqual(template.render(Title="x"), "<html></html>")
+
+    def test_map_literals_leaves_slots(self):
+        template = Template("<a href=\"/\">{{ Title }}</a>")
+        mapped = template.map_literals(lambda literal: literal.replace('href="/', 'href="../'))
+        self.assertEqual(mapped.render(Title='href="/'), '<a href="../">href="/</a>')
+        self.assertEqual(mapped.placeholders, ["Title"])
+        self.assertEqual(mapped, Template("<a href=\"../\">{{ Title }}</a>"))
+        self.assertEqual(hash(mapped), hash(Template(mapped.source)))
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def test_load_template_is_cached_until_changed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, 'w') as f:
+                f.write("<p>{{ Content }}</p>")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            with open(path, 'w') as f:
+                f.write("<div>{{ Content }}</div>")
+            os.utime(path, ns=(0, 0))
+            second = load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.render(Content="x"), "<div>x</div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,6 +15,10 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(node.url, None)
         self.assertNotEqual(node5.url, node.url)
     
+    def test_no_instance_dict(self):
+        node = TextNode("text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+    
     def test_text_node_to_html_node_text(self):
         node = TextNode("Plain text", TextType.TEXT)
         self.assertEqual(node.text_node_to_html_node(), "Plain text")
@@ -0,0 +1,82 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+import contextlib
+from tracing import Tracer, NullTracer, get_tracer, set_tracer, set_quiet, log
+from markdown import iter_markdown_html
+
+
+class TestTracer(unittest.TestCase):
+    def tearDown(self):
+        set_tracer(None)
+        set_quiet(False)
+
+    def test_spans_are_attributed_to_pages(self):
+        tracer = Tracer()
+        with tracer.page("a.md"):
+            with tracer.span("read"):
+                pass
+            tracer.add("write", 0.5)
+        with tracer.span("static"):
+            pass
+        self.assertEqual(set(tracer.pages["a.md"]), {"read", "write", "page"})
+        self.assertEqual(tracer.pages["a.md"]["write"], 0.5)
+        self.assertEqual([event["name"] for event in tracer.events], ["read", "page", "static"])
+        self.assertEqual(tracer.events[1]["args"], {"path": "a.md"})
+
+    def test_slowest_pages(self):
+        tracer = Tracer()
+        tracer.pages = {"fast.md": {"page": 0.1}, "slow.md": {"page": 2.0}, "mid.md": {"page": 1.0}}
+        self.assertEqual([path for path, _ in tracer.slowest_pages(2)], ["slow.md", "mid.md"])
+        self.assertIn("slow.md", tracer.summary(1))
+        self.assertNotIn("fast.md", tracer.summary(1))
+
+    def test_merge(self):
+        tracer = Tracer()
+        worker = Tracer()
+        with worker.page("a.md"):
+            pass
+        tracer.merge(worker)
+        self.assertEqual(len(tracer.events), 1)
+        self.assertIn("a.md", tracer.pages)
+
+    def test_chrome_trace_format(self):
+        tracer = Tracer()
+        with tracer.span("discover"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            tracer.write_chrome_trace(path)
+            with open(path) as f:
+                data = json.load(f)
+        event = data["traceEvents"][0]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["name"], "discover")
+        self.assertGreaterEqual(event["dur"], 0)
+
+    def test_parser_records_parse_and_inline_spans(self):
+        tracer = Tracer()
+        set_tracer(tracer)
+        with tracer.page("doc.md"):
+            "".join(iter_markdown_html(io.StringIO("# Title\n\nSome **bold** text")))
+        self.assertIn("parse", tracer.pages["doc.md"])
+        self.assertIn("inline", tracer.pages["doc.md"])
+
+    def test_default_tracer_is_null(self):
+        self.assertIsInstance(get_tracer(), NullTracer)
+        with get_tracer().span("anything"):
+            pass
+
+    def test_quiet_log(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            log("shown")
+            set_quiet(True)
+            log("hidden")
+        self.assertEqual(out.getvalue(), "shown\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from walk import matches, walk_files, iter_pages, iter_assets, parse_shard, shard_of
+
+
+class TestMatches(unittest.TestCase):
+    def test_no_patterns_matches_everything(self):
+        self.assertTrue(matches("blog/index.md"))
+
+    def test_name_and_path_patterns(self):
+        self.assertTrue(matches("blog/index.md", include=["*.md"]))
+        self.assertTrue(matches("blog/index.md", include=["blog/*"]))
+        self.assertFalse(matches("blog/index.md", include=["*.txt"]))
+        self.assertFalse(matches("blog/index.md", include=["index*/x"]))
+
+    def test_exclude_wins(self):
+        self.assertFalse(matches("drafts/a.md", include=["*.md"], exclude=["drafts/*"]))
+        self.assertFalse(matches("drafts", exclude=["drafts"]))
+
+
+class TestShards(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        for text in ("0/3", "4/3", "1", "a/b", "1/2/3"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_of_is_stable_and_in_range(self):
+        paths = [f"blog/post-{i}/index.md" for i in range(200)]
+        shards = [shard_of(path, 4) for path in paths]
+        self.assertEqual(shards, [shard_of(path, 4) for path in paths])
+        self.assertEqual(set(shards), {1, 2, 3, 4})
+
+
+class TestWalkFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for name in ("index.md", "b/index.md", "b/a/deep/index.md", "a.txt", "drafts/wip.md"):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write("# x")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_depth_first_sorted_order(self):
+        rel_paths = [rel_path for _, rel_path, _ in walk_files(self.root)]
+        self.assertEqual(rel_paths, ["a.txt", "b/a/deep/index.md", "b/index.md", "drafts/wip.md", "index.md"])
+
+    def test_matches_recursive_os_walk(self):
+        expected = sorted(os.path.join(dirpath, name) for dirpath, _, names in os.walk(self.root) for name in names)
+        self.assertEqual(sorted(path for path, _, _ in walk_files(self.root)), expected)
+
+    def test_excluded_directories_are_pruned(self):
+        rel_paths = [rel_path for _, rel_path, _ in walk_files(self.root, exclude=["drafts", "deep"])]
+        self.assertEqual(rel_paths, ["a.txt", "b/index.md", "index.md"])
+
+    def test_iter_pages(self):
+        pages = list(iter_pages(self.root, "/docs", include=["*.md"], exclude=["drafts"]))
+        self.assertEqual(pages, [
+            (os.path.join(self.root, "b", "a", "deep", "index.md"), os.path.join("/docs", "b", "a", "deep", "index.html")),
+            (os.path.join(self.root, "b", "index.md"), os.path.join("/docs", "b", "index.html")),
+            (os.path.join(self.root, "index.md"), os.path.join("/docs", "index.html")),
+        ])
+
+    def test_shards_split_files(self):
+        every = [rel_path for _, rel_path, _ in walk_files(self.root)]
+        shards = [[rel_path for _, rel_path, _ in walk_files(self.root, shard=(i, 3))] for i in (1, 2, 3)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(every))
+
+    def test_iter_assets_reports_sizes(self):
+        assets = list(iter_assets(self.root, "/docs", include=["*.txt"]))
+        self.assertEqual(assets, [(os.path.join(self.root, "a.txt"), os.path.join("/docs", "a.txt"), 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from watch import snapshot, diff_snapshots
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "blog"))
+        self.page = os.path.join(self.root, "blog", "index.md")
+        with open(self.page, 'w') as f:
+            f.write("# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_snapshot_lists_nested_files(self):
+        self.assertEqual(list(snapshot(self.root)), [self.page])
+
+    def test_snapshot_of_single_file(self):
+        self.assertEqual(list(snapshot(self.page)), [self.page])
+
+    def test_snapshot_of_missing_directory(self):
+        self.assertEqual(snapshot(os.path.join(self.root, "missing")), {})
+
+    def test_diff_detects_changes_and_removals(self):
+        before = snapshot(self.root)
+        with open(self.page, 'a') as f:
+            f.write("\n\nmore")
+        added = os.path.join(self.root, "new.md")
+        with open(added, 'w') as f:
+            f.write("# New")
+        changed, removed = diff_snapshots(before, snapshot(self.root))
+        self.assertEqual(changed, sorted([self.page, added]))
+        self.assertEqual(removed, [])
+
+        before = snapshot(self.root)
+        os.remove(added)
+        changed, removed = diff_snapshots(before, snapshot(self.root))
+        self.assertEqual((changed, removed), ([], [added]))
+
+    def test_diff_unchanged(self):
+        self.assertEqual(diff_snapshots(snapshot(self.root), snapshot(self.root)), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
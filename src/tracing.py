@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import contextlib
+
+# Set by set_quiet(); silences the per-file progress lines
+_quiet = False
+
+
+def set_quiet(quiet):
+    global _quiet
+    _quiet = quiet
+
+def is_quiet():
+    return _quiet
+
+def log(message):
+    """Print a per-file progress line unless quiet mode is on."""
+    if not _quiet:
+        print(message)
+
+
+class Tracer:
+    """
+    Records timing spans for a build.
+
+    Spans become Chrome trace_event "complete" events, and spans recorded
+    inside page() are also added up per page and stage so the slowest
+    pages can be summarized. Stages measured in many small pieces, such as
+    writes while streaming, are added with add() instead of as spans.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+        self.pages = {}
+        self._page = None
+        self._pid = os.getpid()
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append({
+                "name": name,
+                "cat": "build",
+                "ph": "X",
+                "ts": start * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self._pid,
+                "tid": 0,
+                "args": args,
+            })
+            self.add(name, end - start)
+
+    @contextlib.contextmanager
+    def page(self, path):
+        """Attribute the spans recorded inside this block to the page at path."""
+        previous, self._page = self._page, path
+        self.pages.setdefault(path, {})
+        try:
+            with self.span("page", path=path):
+                yield
+        finally:
+            self._page = previous
+
+    def add(self, stage, seconds):
+        """Add time to a stage of the current page."""
+        if self._page is not None:
+            stages = self.pages[self._page]
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def merge(self, other):
+        """Fold in the events and page totals recorded by a worker's tracer."""
+        self.events.extend(other.events)
+        for path, stages in other.pages.items():
+            merged = self.pages.setdefault(path, {})
+            for stage, seconds in stages.items():
+                merged[stage] = merged.get(stage, 0.0) + seconds
+
+    def slowest_pages(self, count=10):
+        """Return (path, stage totals) for the count slowest pages."""
+        ranked = sorted(self.pages.items(), key=lambda item: item[1].get("page", 0.0), reverse=True)
+        return ranked[:count]
+
+    def write_chrome_trace(self, path):
+        """Write the events as a Chrome trace_event JSON file (chrome://tracing, Perfetto)."""
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, count=10):
+        """Format the slowest pages and their per-stage times as a table."""
+        stages = ["read", "template", "parse", "inline", "write", "page"]
+        lines = ["Slowest pages (ms): " + " ".join(f"{stage:>9}" for stage in stages)]
+        for path, totals in self.slowest_pages(count):
+            times = " ".join(f"{totals.get(stage, 0.0) * 1000:9.2f}" for stage in stages)
+            lines.append(f"  {times}  {path}")
+        return "\n".join(lines)
+
+
+class NullTracer:
+    """Tracer used when tracing is off; every span is a shared no-op."""
+
+    enabled = False
+    _null_context = contextlib.nullcontext()
+
+    def span(self, name, **args):
+        return self._null_context
+
+    def page(self, path):
+        return self._null_context
+
+    def add(self, stage, seconds):
+        pass
+
+
+_tracer = NullTracer()
+
+
+def get_tracer():
+    return _tracer
+
+def set_tracer(tracer):
+    global _tracer
+    _tracer = tracer if tracer is not None else NullTracer()
@@ -0,0 +1,82 @@
+import os
+import fnmatch
+import hashlib
+
+
+def matches(rel_path, include=None, exclude=None):
+    """
+    Check a "/" separated path against include and exclude glob lists. A
+    pattern matches the whole path or, if it has no "/", the file name, so
+    "*.md" and "drafts/*" both work. Excludes win over includes.
+    """
+    name = rel_path.rsplit("/", 1)[-1]
+
+    def match(patterns):
+        return any(fnmatch.fnmatchcase(rel_path, pattern) or
+                   ("/" not in pattern and fnmatch.fnmatchcase(name, pattern)) for pattern in patterns)
+
+    if exclude and match(exclude):
+        return False
+    return not include or match(include)
+
+def parse_shard(text):
+    """Parse "i/N" into (i, N), where shards are numbered from 1 to N."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {text!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and {count}, got {index}")
+    return index, count
+
+def shard_of(rel_path, count):
+    """
+    The shard, from 1 to count, that a "/" separated path belongs to. Based
+    on a hash of the path, so every machine agrees however files are listed.
+    """
+    digest = hashlib.sha256(rel_path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def in_shard(rel_path, shard):
+    """Check whether a path belongs to shard, an (i, N) pair; None selects everything."""
+    return shard is None or shard_of(rel_path, shard[1]) == shard[0]
+
+def walk_files(root, include=None, exclude=None, shard=None):
+    """
+    Yield (path, rel_path, entry) for every file under root, depth first in
+    sorted name order, without recursing on the Python stack. rel_path is
+    "/" separated, and entry is the os.DirEntry, so callers can use its
+    cached type and stat instead of calling os.stat again. Excluded
+    directories are not descended into; include only filters files. With
+    shard, an (i, N) pair, only the files of that shard are yielded.
+    """
+    # Each stack item is a directory's remaining entries, reversed so the
+    # next entry in name order is popped first
+    stack = [(root, "", _sorted_entries(root))]
+    while stack:
+        path, rel_dir, entries = stack[-1]
+        if not entries:
+            stack.pop()
+            continue
+        entry = entries.pop()
+        rel_path = rel_dir + entry.name
+        if entry.is_dir():
+            if not exclude or matches(rel_path, exclude=exclude):
+                stack.append((entry.path, rel_path + "/", _sorted_entries(entry.path)))
+        elif entry.is_file() and matches(rel_path, include, exclude) and in_shard(rel_path, shard):
+            yield entry.path, rel_path, entry
+
+def _sorted_entries(path):
+    with os.scandir(path) as entries:
+        return sorted(entries, key=lambda entry: entry.name, reverse=True)
+
+def iter_pages(content_dir, dest_root, include=None, exclude=None, shard=None):
+    """Yield (markdown path, html path) for every page under content_dir, lazily."""
+    for path, rel_path, _ in walk_files(content_dir, include, exclude, shard):
+        if rel_path.endswith('.md'):
+            yield path, os.path.join(dest_root, rel_path[:-3].replace("/", os.sep) + '.html')
+
+def iter_assets(static_dir, dest_root, include=None, exclude=None, shard=None):
+    """Yield (source path, dest path, size) for every static file under static_dir, lazily."""
+    for path, rel_path, entry in walk_files(static_dir, include, exclude, shard):
+        yield path, os.path.join(dest_root, rel_path.replace("/", os.sep)), entry.stat().st_size
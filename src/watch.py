@@ -0,0 +1,60 @@
+import os
+import time
+
+
+def snapshot(root):
+    """
+    Map every file under root (or root itself, if it is a file) to its
+    (mtime_ns, size). Directories are read with os.scandir so each entry's
+    type comes from the directory listing rather than a separate stat.
+    """
+    files = {}
+    if os.path.isfile(root):
+        stat = os.stat(root)
+        files[root] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            # Removed between listing its parent and reading it
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    continue
+    return files
+
+def diff_snapshots(old, new):
+    """Return sorted lists of the paths that changed or appeared, and that were removed."""
+    changed = sorted(path for path, state in new.items() if old.get(path) != state)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+def watch(roots, on_change, interval=0.2):
+    """
+    Poll roots for changes and call on_change(changed, removed) with the
+    affected file paths. Runs until interrupted.
+    """
+    previous = {}
+    for root in roots:
+        previous.update(snapshot(root))
+
+    while True:
+        time.sleep(interval)
+        current = {}
+        for root in roots:
+            current.update(snapshot(root))
+        changed, removed = diff_snapshots(previous, current)
+        if changed or removed:
+            on_change(changed, removed)
+        previous = current